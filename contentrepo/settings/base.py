@@ -187,6 +187,28 @@ if "REDIS_LOCATION" in os.environ:
 
 CACHES = {"default": env.cache("CACHE_URL", default="redis://127.0.0.1:6379/1")}
 
+# How long pages API detail responses are cached for, in seconds. The cache is
+# invalidated whenever a page is published, unpublished, moved or deleted, or has a
+# new revision saved. Set to 0 to disable the cache.
+PAGES_API_CACHE_TIMEOUT = env.int("PAGES_API_CACHE_TIMEOUT", 60 * 60)
+
+# The most pages that can be requested at once from the pages API batch endpoint
+PAGES_API_BATCH_SIZE = env.int("PAGES_API_BATCH_SIZE", 50)
+
+# How many seconds before a changed_since listing is read its synced_at is, so that
+# content published in transactions that commit after the listing is read isn't
+# missed by the next poll
+CHANGED_SINCE_SAFETY_WINDOW = env.int("CHANGED_SINCE_SAFETY_WINDOW", 60)
+
+# Page views are queued in memory and written in batches by a background thread.
+# They're written every PAGE_VIEW_FLUSH_INTERVAL seconds, or as soon as
+# PAGE_VIEW_FLUSH_SIZE are queued. If PAGE_VIEW_BUFFER_SIZE are queued, requests wait
+# for them to be written.
+PAGE_VIEW_BUFFERING = env.bool("PAGE_VIEW_BUFFERING", True)
+PAGE_VIEW_FLUSH_SIZE = env.int("PAGE_VIEW_FLUSH_SIZE", 100)
+PAGE_VIEW_FLUSH_INTERVAL = env.float("PAGE_VIEW_FLUSH_INTERVAL", 5.0)
+PAGE_VIEW_BUFFER_SIZE = env.int("PAGE_VIEW_BUFFER_SIZE", 10000)
+
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",  # noqa
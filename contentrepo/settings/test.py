@@ -1,3 +1,5 @@
+import tempfile
+
 from .dev import *  # noqa
 
 DATABASES = {"default": env.db("CONTENTREPO_DATABASE", default="sqlite://:memory:")}
@@ -9,6 +11,15 @@ FB_BUSINESS_ID = "27121231234"
 
 WHATSAPP_CREATE_TEMPLATES = False
 
+# Tests that exercise the pages API cache enable it explicitly
+PAGES_API_CACHE_TIMEOUT = 0
+
+# Write page views immediately, so that tests can see them
+PAGE_VIEW_BUFFERING = False
+
+# Keep files uploaded by tests out of the repo
+MEDIA_ROOT = tempfile.mkdtemp(prefix="contentrepo-test-media-")
+
 # Switch back from ManifestStaticFilesStorage so we don't need collectstatic in tests.
 STORAGES["staticfiles"] = {
     "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
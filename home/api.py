@@ -1,15 +1,33 @@
-from rest_framework.exceptions import NotFound
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q, QuerySet, prefetch_related_objects
+from django.db.models.functions import Lower
+from django.urls import path
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
+from modelcluster.contrib.taggit import ClusterTaggableManager
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.filters import SearchFilter
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
+from taggit.models import Tag
 from wagtail.api.v2.router import WagtailAPIRouter
 from wagtail.api.v2.views import BaseAPIViewSet, PagesAPIViewSet
 from wagtail.documents.api.v2.views import DocumentsAPIViewSet
 from wagtail.images.api.v2.views import ImagesAPIViewSet
-from wagtail.models import Locale
+from wagtail.models import Locale, Revision
 from wagtailmedia.api.views import MediaAPIViewSet
 
-from .models import Assessment, AssessmentTag, OrderedContentSet
+from . import api_cache
+from .change_feed import get_tombstones
+from .message_manifest import get_revision_message_manifest
+from .models import Assessment, AssessmentTag, OrderedContentSet, PageView
+from .page_views import record_page_view, record_page_views
 from .serializers import (
     AssessmentSerializer,
     ContentPageSerializer,
@@ -20,18 +38,198 @@ from .models import (  # isort:skip
     ContentPage,
     ContentPageIndex,
     ContentPageTag,
+    ContentTrigger,
     TriggeredContent,
     WhatsAppTemplate,
 )
 
 
-class ContentPagesViewSet(PagesAPIViewSet):
+class KeysetCursorPagination(CursorPagination):
+    ordering = "pk"
+
+
+class ContentPagination(PageNumberPagination):
+    """
+    Page number pagination, or, if the request has a `cursor` query parameter,
+    keyset pagination on the primary key. An empty `cursor` starts at the
+    beginning, and each response links to the next cursor. Cursor pagination
+    doesn't count the results or scan past an offset, so walking a whole listing
+    costs the same for every page.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if "cursor" not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        if "page" in request.query_params or "order" in request.query_params:
+            raise ValidationError(
+                {"cursor": ["Cursor pagination can't be combined with page or order"]}
+            )
+        if not isinstance(queryset, QuerySet):
+            raise ValidationError(
+                {"cursor": ["Cursor pagination can't be combined with search"]}
+            )
+        self.cursor_pagination = KeysetCursorPagination()
+        return self.cursor_pagination.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if hasattr(self, "cursor_pagination"):
+            return self.cursor_pagination.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def is_first_page(self):
+        if hasattr(self, "cursor_pagination"):
+            # An empty cursor has no position
+            cursor = self.cursor_pagination.cursor
+            return cursor is None or cursor.position is None
+        return self.page.number == 1
+
+
+class ChangedSinceMixin:
+    """
+    Adds a `changed_since` query parameter to a listing, for clients that keep a
+    copy of the content in sync. It takes an ISO 8601 timestamp, and limits the
+    listing to the live objects changed after that time, according to
+    `changed_since_field`. The first page of the
+    response also lists the objects that were unpublished or deleted after that
+    time under `deleted`, and has the time to pass as `changed_since` on the next
+    poll under `synced_at`.
+
+    `synced_at` is `CHANGED_SINCE_SAFETY_WINDOW` seconds before the listing is
+    read, so that objects published in transactions that commit after it is read
+    are still in the next poll. Objects published within that window can be
+    listed by two polls in a row.
+    """
+
+    changed_since_model = None
+    changed_since_field = "updated_at"
+
+    def get_changed_since(self):
+        value = self.request.query_params.get("changed_since")
+        if value is None or self.action != "listing_view":
+            return None
+        if "qa" in self.request.query_params:
+            raise ValidationError(
+                {"changed_since": ["changed_since can't be combined with qa"]}
+            )
+        try:
+            changed_since = parse_datetime(value)
+        except ValueError:
+            changed_since = None
+        if changed_since is None:
+            raise ValidationError(
+                {"changed_since": ["Please provide an ISO 8601 timestamp"]}
+            )
+        if timezone.is_naive(changed_since):
+            changed_since = timezone.make_aware(changed_since)
+        return changed_since
+
+    def filter_changed_since(self, queryset):
+        changed_since = self.get_changed_since()
+        if changed_since is None:
+            return queryset
+        # Taken before the listing is read, so that the next poll doesn't miss
+        # anything published while this one is running
+        self.synced_at = timezone.now() - datetime.timedelta(
+            seconds=settings.CHANGED_SINCE_SAFETY_WINDOW
+        )
+        return queryset.filter(
+            live=True, **{f"{self.changed_since_field}__gt": changed_since}
+        )
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        changed_since = self.get_changed_since()
+        if changed_since is not None and self.paginator.is_first_page():
+            tombstones = get_tombstones(
+                self.changed_since_model or self.model, changed_since
+            )
+            response.data["deleted"] = [
+                {
+                    "id": tombstone.object_id,
+                    "action": tombstone.action,
+                    "timestamp": tombstone.timestamp,
+                }
+                for tombstone in tombstones
+            ]
+            response.data["synced_at"] = self.synced_at
+        return response
+
+
+class LatestRevisionMixin:
+    """
+    With the `qa` query parameter, returns each object with the fields in
+    `revision_fields` taken from its latest revision, so that drafts can be
+    reviewed. Only the objects that are returned, the current page of a listing
+    or the object of a detail request, are loaded from their revisions.
+
+    The revisions are loaded with the objects, and the foreign keys and tags in
+    them are loaded together afterwards. Foreign keys to objects that have since
+    been deleted are returned as None.
+    """
+
+    revision_fields = []
+
+    def get_latest_revision_queryset(self):
+        return self.model.objects.select_related("latest_revision").order_by(
+            "latest_revision_id"
+        )
+
+    def overlay_latest_revisions(self, objs):
+        objs = list(objs)
+        revised = [obj for obj in objs if obj.latest_revision is not None]
+        foreign_keys = []
+        tagged_items = []
+        for obj in revised:
+            revision = self.model.from_serializable_data(
+                obj.latest_revision.content, check_fks=False
+            )
+            for name in self.revision_fields:
+                field = self.model._meta.get_field(name)
+                if field.many_to_one:
+                    setattr(obj, field.attname, getattr(revision, field.attname))
+                    foreign_keys.append(name)
+                    continue
+                value = getattr(revision, name)
+                if isinstance(field, ClusterTaggableManager):
+                    manager = value.get_tagged_item_manager()
+                    tagged_items.append((manager, list(manager.all())))
+                setattr(obj, name, value)
+
+        prefetch_related_objects(revised, *set(foreign_keys))
+        prefetch_related_objects(
+            [item for _, items in tagged_items for item in items], "tag"
+        )
+        for manager, items in tagged_items:
+            # Tags that have been deleted since the revision was saved
+            manager.set([item for item in items if item.tag is not None])
+        return objs
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.request.query_params.get("qa"):
+            self.overlay_latest_revisions(page)
+        return page
+
+    def get_object(self):
+        obj = super().get_object()
+        if self.request.query_params.get("qa"):
+            self.overlay_latest_revisions([obj])
+        return obj
+
+
+class ContentPagesViewSet(ChangedSinceMixin, PagesAPIViewSet):
     base_serializer_class = ContentPageSerializer
+    changed_since_model = ContentPage
+    # Page content only changes on the live row when a revision is published
+    changed_since_field = "last_published_at"
     known_query_parameters = PagesAPIViewSet.known_query_parameters.union(
         [
             "tag",
+            "tag_operator",
             "trigger",
             "page",
+            "cursor",
+            "changed_since",
             "qa",
             "whatsapp",
             "viber",
@@ -42,38 +240,168 @@ class ContentPagesViewSet(PagesAPIViewSet):
             "ussd",
         ]
     )
-    pagination_class = PageNumberPagination
+    pagination_class = ContentPagination
 
     def detail_view(self, request, pk):
+        cached = None
+        qa = "qa" in request.GET and request.GET["qa"] == "True"
+        if not qa:
+            cached = api_cache.get_page_response(request, pk)
+        if cached is not None:
+            # Only responses for live pages are cached, and they're dropped when
+            # any page is published or unpublished
+            revision_id, live = cached[1], True
+        else:
+            state = (
+                ContentPage.objects.filter(id=pk)
+                .values_list("latest_revision_id", "live")
+                .first()
+            )
+            if state is None:
+                raise NotFound({"page": ["Page matching query does not exist."]})
+            revision_id, live = state
+        etag = api_cache.get_etag(
+            request, ContentPage._meta.label, pk, revision_id, live
+        )
+
+        if (live or qa) and etag_matches(request, etag):
+            if not qa:
+                record_page_view(
+                    PageView(
+                        page_id=pk,
+                        revision_id=revision_id,
+                        **ContentPage.get_page_view_fields(request.query_params),
+                    )
+                )
+            return not_modified(etag)
+
+        response = self.get_detail_response(request, pk, qa, cached)
+        response["ETag"] = etag
+        return response
+
+    def get_detail_response(self, request, pk, qa, cached):
         try:
-            if "qa" in request.GET and request.GET["qa"] == "True":
-                instance = ContentPage.objects.get(
-                    id=pk
-                ).get_latest_revision_as_object()
+            if qa:
+                page = ContentPage.objects.get(id=pk)
+                instance = page.get_latest_revision_as_object()
+                if not instance.message_manifest and page.latest_revision_id:
+                    instance.message_manifest = get_revision_message_manifest(
+                        instance,
+                        page.latest_revision_id,
+                        page.latest_revision_created_at,
+                    )
                 serializer = self.get_serializer(instance)
                 return Response(serializer.data)
-            else:
-                ContentPage.objects.get(id=pk).save_page_view(request.query_params)
+            if cached is not None:
+                data, revision_id = cached
+                record_page_view(
+                    PageView(
+                        page_id=pk,
+                        revision_id=revision_id,
+                        **ContentPage.get_page_view_fields(request.query_params),
+                    )
+                )
+                return Response(data)
+            page = ContentPage.objects.get(id=pk)
+            page.save_page_view(request.query_params)
         except ContentPage.DoesNotExist:
             raise NotFound({"page": ["Page matching query does not exist."]})
 
-        return super().detail_view(request, pk)
+        response = super().detail_view(request, pk)
+        api_cache.set_page_response(request, pk, response.data, page.latest_revision_id)
+        return response
+
+    def batch_view(self, request):
+        """
+        Returns the pages with the comma separated ids in `id` and slugs in `slug`,
+        in that order, serialized as they are in the detail view. A page view is
+        recorded for each page. Slugs are looked up in the locale in `locale`, or
+        in the default locale. QA mode isn't supported.
+        """
+        if "qa" in request.query_params:
+            raise ValidationError({"qa": ["QA mode is not supported for batches"]})
+        ids = get_batch_values(request, "id")
+        slugs = get_batch_values(request, "slug")
+        if not ids and not slugs:
+            raise ValidationError({"id": ["Please provide page ids or slugs"]})
+        if len(ids) + len(slugs) > settings.PAGES_API_BATCH_SIZE:
+            raise ValidationError(
+                {
+                    "id": [
+                        f"At most {settings.PAGES_API_BATCH_SIZE} pages can be "
+                        "requested at once"
+                    ]
+                }
+            )
+        try:
+            ids = [int(pk) for pk in ids]
+        except ValueError:
+            raise ValidationError({"id": ["Page ids must be integers"]})
+
+        queryset = self.get_queryset()
+        locale = request.query_params.get("locale")
+        # Slugs are only unique within a locale. Ids are looked up in any locale.
+        slug_locale_id = None
+        if slugs:
+            slug_locale = (
+                Locale.objects.filter(language_code=locale).first()
+                if locale
+                else Locale.get_default()
+            )
+            slug_locale_id = slug_locale.id if slug_locale else None
+        queryset = queryset.filter(
+            Q(id__in=ids) | Q(slug__in=slugs, locale_id=slug_locale_id)
+        )
+        pages_by_id = {page.id: page for page in queryset}
+        pages_by_slug = {
+            page.slug: page
+            for page in pages_by_id.values()
+            if page.locale_id == slug_locale_id
+        }
+
+        pages = []
+        for page in [pages_by_id.get(pk) for pk in ids] + [
+            pages_by_slug.get(slug) for slug in slugs
+        ]:
+            if page is not None and page not in pages:
+                pages.append(page)
+
+        page_view_fields = ContentPage.get_page_view_fields(request.query_params)
+        record_page_views(
+            [
+                PageView(
+                    page_id=page.id,
+                    revision_id=page.latest_revision_id,
+                    **page_view_fields,
+                )
+                for page in pages
+            ]
+        )
+
+        serializer = self.base_serializer_class(
+            pages, many=True, context=self.get_serializer_context()
+        )
+        return Response({"count": len(pages), "results": serializer.data})
+
+    @classmethod
+    def get_urlpatterns(cls):
+        return super().get_urlpatterns() + [
+            path("batch/", cls.as_view({"get": "batch_view"}), name="batch"),
+        ]
 
     def listing_view(self, request, *args, **kwargs):
         # If this request is flagged as QA then we should display the pages that have the filtering tags
         # or triggers in their draft versions
         if "qa" in request.GET and request.GET["qa"] == "True":
-            tag = self.request.query_params.get("tag")
+            tags = get_tag_names(self.request.query_params.get("tag"))
+            tag_operator = get_tag_operator(request)
             trigger = self.request.query_params.get("trigger")
             have_new_triggers = []
             have_new_tags = []
-            unpublished = ContentPage.objects.filter(has_unpublished_changes="True")
-            for page in unpublished:
-                latest_rev = page.get_latest_revision_as_object()
-                if trigger and latest_rev.triggers.filter(name=trigger).exists():
-                    have_new_triggers.append(page.id)
-                if tag and latest_rev.tags.filter(name=tag).exists():
-                    have_new_tags.append(page.id)
+            if trigger:
+                have_new_triggers = draft_pages_triggered_by(trigger)
+            if tags:
+                have_new_tags = draft_pages_tagged_with(tags, tag_operator)
 
             queryset = self.get_queryset()
             self.check_query_parameters(queryset)
@@ -88,7 +416,7 @@ class ContentPagesViewSet(PagesAPIViewSet):
 
     def get_queryset(self):
         qa = self.request.query_params.get("qa")
-        queryset = ContentPage.objects.live().prefetch_related("locale")
+        queryset = ContentPage.objects.live()
 
         if qa:
             queryset = queryset | ContentPage.objects.not_live()
@@ -106,19 +434,165 @@ class ContentPagesViewSet(PagesAPIViewSet):
         elif "viber" in self.request.query_params:
             queryset = queryset.filter(enable_viber=True)
 
-        tag = self.request.query_params.get("tag")
-        if tag:
-            ids = []
-            for t in ContentPageTag.objects.filter(tag__name__iexact=tag):
-                ids.append(t.content_object_id)
-            queryset = queryset.filter(id__in=ids)
+        tags = get_tag_names(self.request.query_params.get("tag"))
+        if tags:
+            queryset = queryset.filter(
+                id__in=pages_tagged_with(tags, get_tag_operator(self.request))
+            )
         trigger = self.request.query_params.get("trigger")
         if trigger is not None:
-            ids = []
-            for t in TriggeredContent.objects.filter(tag__name__iexact=trigger.strip()):
-                ids.append(t.content_object_id)
-            queryset = queryset.filter(id__in=ids)
-        return queryset
+            queryset = queryset.filter(
+                id__in=TriggeredContent.objects.alias(name=Lower("tag__name"))
+                .filter(name=trigger.strip().lower())
+                .values("content_object_id")
+            )
+        queryset = self.filter_changed_since(queryset)
+        return self.base_serializer_class.prefetch_queryset(queryset)
+
+
+class ConditionalDetailMixin:
+    """
+    Adds an ETag to detail responses, built from the latest revision of the
+    object and when it was last saved, and answers requests that already have it
+    with 304 Not Modified without loading the object.
+    """
+
+    def detail_view(self, request, pk):
+        state = (
+            self.model.objects.filter(pk=pk)
+            .values_list("latest_revision_id", "live", "updated_at")
+            .first()
+        )
+        if state is None:
+            return super().detail_view(request, pk)
+        etag = api_cache.get_etag(request, self.model._meta.label, pk, *state)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        response = super().detail_view(request, pk)
+        response["ETag"] = etag
+        return response
+
+
+def etag_matches(request, etag):
+    """
+    Whether the request's If-None-Match header has `etag`
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    etags = [e.removeprefix("W/") for e in parse_etags(if_none_match)]
+    return etag in etags or "*" in etags
+
+
+def not_modified(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def get_batch_values(request, name):
+    """
+    Splits a comma separated batch endpoint query parameter into its values
+    """
+    value = request.query_params.get(name, "")
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def get_tag_names(tag):
+    """
+    Splits a comma separated `tag` query parameter into lower cased tag names
+    """
+    if not tag:
+        return []
+    return [t.strip().lower() for t in tag.split(",") if t.strip()]
+
+
+def get_tag_operator(request):
+    operator = request.query_params.get("tag_operator", "or").lower()
+    if operator not in ("and", "or"):
+        raise ValidationError(
+            {"tag_operator": ["Tag operator must be one of 'and' or 'or'"]}
+        )
+    return operator
+
+
+def draft_pages_tagged_with(tags, operator="or"):
+    """
+    Returns the ids of the content pages with unpublished changes whose latest
+    revision has any (`or`) or all (`and`) of the lower cased tag names in `tags`
+    """
+    ids_by_name = defaultdict(set)
+    for tag_id, name in (
+        Tag.objects.annotate(lower_name=Lower("name"))
+        .filter(lower_name__in=tags)
+        .values_list("id", "lower_name")
+    ):
+        ids_by_name[name].add(tag_id)
+    if operator == "and":
+        tag_id_groups = [ids_by_name[name] for name in set(tags)]
+    else:
+        tag_id_groups = [set().union(*ids_by_name.values())]
+    return draft_pages_with_items("tagged_items", tag_id_groups)
+
+
+def draft_pages_triggered_by(trigger):
+    """
+    Returns the ids of the content pages with unpublished changes whose latest
+    revision has the trigger `trigger`, ignoring case and surrounding whitespace
+    """
+    trigger_ids = set(
+        ContentTrigger.objects.alias(name_lower=Lower("name"))
+        .filter(name_lower=trigger.strip().lower())
+        .values_list("id", flat=True)
+    )
+    return draft_pages_with_items("triggered_items", [trigger_ids])
+
+
+def draft_pages_with_items(relation, tag_id_groups):
+    """
+    Returns the ids of the content pages with unpublished changes whose latest
+    revision has a `relation` item (eg. "tagged_items") for one of the tag ids in
+    each of `tag_id_groups`.
+
+    The latest revisions are fetched in a single query. On Postgres the items are
+    matched with JSONB containment in the query, elsewhere only the `relation`
+    items of each revision are fetched and matched here.
+    """
+    if not all(tag_id_groups):
+        return []
+    revisions = Revision.objects.filter(
+        id__in=ContentPage.objects.filter(has_unpublished_changes=True).values(
+            "latest_revision_id"
+        )
+    )
+    if connection.vendor == "postgresql":
+        for tag_ids in tag_id_groups:
+            matches = Q()
+            for tag_id in tag_ids:
+                matches |= Q(**{f"content__{relation}__contains": [{"tag": tag_id}]})
+            revisions = revisions.filter(matches)
+        return [int(pk) for pk in revisions.values_list("object_id", flat=True)]
+
+    page_ids = []
+    for object_id, items in revisions.values_list("object_id", f"content__{relation}"):
+        item_tag_ids = {item["tag"] for item in items or []}
+        if all(item_tag_ids & tag_ids for tag_ids in tag_id_groups):
+            page_ids.append(int(object_id))
+    return page_ids
+
+
+def pages_tagged_with(tags, operator="or"):
+    """
+    Returns a subquery of the ids of the content pages that have any (`or`) or
+    all (`and`) of the lower cased tag names in `tags`
+    """
+    tagged = ContentPageTag.objects.alias(name=Lower("tag__name")).filter(name__in=tags)
+    if operator == "and":
+        tagged = (
+            tagged.values("content_object_id")
+            .annotate(matched=Count("name", distinct=True))
+            .filter(matched=len(set(tags)))
+        )
+    return tagged.values("content_object_id")
 
 
 class ContentPageIndexViewSet(PagesAPIViewSet):
@@ -128,9 +602,12 @@ class ContentPageIndexViewSet(PagesAPIViewSet):
         return ContentPageIndex.objects.live()
 
 
-class OrderedContentSetViewSet(BaseAPIViewSet):
+class OrderedContentSetViewSet(
+    ConditionalDetailMixin, ChangedSinceMixin, LatestRevisionMixin, BaseAPIViewSet
+):
     model = OrderedContentSet
     base_serializer_class = OrderedContentSetSerializer
+    revision_fields = ["name", "pages", "profile_fields", "locale", "slug"]
     listing_default_fields = BaseAPIViewSet.listing_default_fields + [
         "name",
         "profile_fields",
@@ -139,9 +616,18 @@ class OrderedContentSetViewSet(BaseAPIViewSet):
         "slug",
     ]
     known_query_parameters = BaseAPIViewSet.known_query_parameters.union(
-        ["page", "qa", "gender", "age", "relationship", "slug"]
+        [
+            "page",
+            "cursor",
+            "changed_since",
+            "qa",
+            "gender",
+            "age",
+            "relationship",
+            "slug",
+        ]
     )
-    pagination_class = PageNumberPagination
+    pagination_class = ContentPagination
     search_fields = ["name", "profile_fields"]
     filter_backends = (SearchFilter,)
 
@@ -210,17 +696,7 @@ class OrderedContentSetViewSet(BaseAPIViewSet):
 
         if qa:
             # return the latest revision for each OrderedContentSet
-            queryset = OrderedContentSet.objects.all().order_by("latest_revision_id")
-
-            for ocs in queryset:
-                latest_revision = ocs.revisions.order_by("-created_at").first()
-                if latest_revision:
-                    latest_revision = latest_revision.as_object()
-                    ocs.name = latest_revision.name
-                    ocs.pages = latest_revision.pages
-                    ocs.profile_fields = latest_revision.profile_fields
-                    ocs.locale = latest_revision.locale
-                    ocs.slug = latest_revision.slug
+            queryset = self.get_latest_revision_queryset()
 
         else:
             queryset = OrderedContentSet.objects.filter(
@@ -228,29 +704,51 @@ class OrderedContentSetViewSet(BaseAPIViewSet):
             ).order_by("last_published_at")
 
         if gender or age or relationship:
-            # it looks like you can't use advanced queries to filter on StreamFields
-            # so we have to do it like this.``
-            filter_ids = [
-                self._filter_queryset_by_profile_fields(x, gender, age, relationship)
-                for x in queryset
-            ]
-            queryset = queryset.filter(id__in=filter_ids).order_by("last_published_at")
+            if qa:
+                # The profile fields of drafts are only in their revisions, so we have
+                # to match them like this
+                filter_ids = [
+                    self._filter_queryset_by_profile_fields(
+                        x, gender, age, relationship
+                    )
+                    for x in self.overlay_latest_revisions(queryset)
+                ]
+                queryset = queryset.filter(id__in=filter_ids)
+            else:
+                profile_filters = {
+                    "profile_gender": gender,
+                    "profile_age": age,
+                    "profile_relationship": relationship,
+                }
+                queryset = queryset.filter(
+                    **{
+                        field: value
+                        for field, value in profile_filters.items()
+                        if value
+                    }
+                )
+            queryset = queryset.order_by("last_published_at")
         if slug:
             queryset = queryset.filter(slug=slug)
         if locale:
             locale = Locale.objects.get(language_code=locale)
             queryset = queryset.filter(locale=locale)
-        return queryset
+        return self.filter_changed_since(queryset)
 
 
-class WhatsAppTemplateViewset(BaseAPIViewSet):
+class WhatsAppTemplateViewset(
+    ConditionalDetailMixin, ChangedSinceMixin, LatestRevisionMixin, BaseAPIViewSet
+):
     model = WhatsAppTemplate
+    revision_fields = ["name"]
     listing_default_fields = BaseAPIViewSet.listing_default_fields + [
         "name",
         "body",
     ]
-    known_query_parameters = BaseAPIViewSet.known_query_parameters.union(["qa"])
-    pagination_class = PageNumberPagination
+    known_query_parameters = BaseAPIViewSet.known_query_parameters.union(
+        ["cursor", "changed_since", "qa"]
+    )
+    pagination_class = ContentPagination
     search_fields = ["name", "body"]
     filter_backends = (SearchFilter,)
 
@@ -259,32 +757,45 @@ class WhatsAppTemplateViewset(BaseAPIViewSet):
 
         if qa:
             # return the latest revision for each WhatsApp Template
-            queryset = WhatsAppTemplate.objects.all().order_by("latest_revision_id")
-            for wat in queryset:
-                latest_revision = wat.revisions.order_by("-created_at").first()
-                if latest_revision:
-                    latest_revision = latest_revision.as_object()
-                    wat.name = latest_revision.name
-                    wat.pages = latest_revision.pages
-                    wat.profile_fields = latest_revision.profile_fields
+            queryset = self.get_latest_revision_queryset()
 
         else:
             queryset = WhatsAppTemplate.objects.filter(live=True).order_by(
                 "last_published_at"
             )
-        return queryset
+        return self.filter_changed_since(queryset)
 
 
-class AssessmentViewSet(BaseAPIViewSet):
+class AssessmentViewSet(
+    ConditionalDetailMixin, ChangedSinceMixin, LatestRevisionMixin, BaseAPIViewSet
+):
     base_serializer_class = AssessmentSerializer
     known_query_parameters = BaseAPIViewSet.known_query_parameters.union(
         [
             "tag",
             "qa",
             "page",
+            "cursor",
+            "changed_since",
         ]
     )
     model = Assessment
+    revision_fields = [
+        "title",
+        "slug",
+        "version",
+        "locale",
+        "tags",
+        "high_result_page",
+        "high_inflection",
+        "medium_result_page",
+        "medium_inflection",
+        "low_result_page",
+        "skip_threshold",
+        "skip_high_result_page",
+        "generic_error",
+        "questions",
+    ]
     body_fields = BaseAPIViewSet.body_fields + [
         "title",
         "slug",
@@ -318,7 +829,7 @@ class AssessmentViewSet(BaseAPIViewSet):
         "generic_error",
         "questions",
     ]
-    pagination_class = PageNumberPagination
+    pagination_class = ContentPagination
     search_fields = ["title"]
     filter_backends = (SearchFilter,)
 
@@ -328,28 +839,7 @@ class AssessmentViewSet(BaseAPIViewSet):
 
         if qa:
             # return the latest revision for each Assessment
-            queryset = Assessment.objects.all().order_by("latest_revision_id")
-            for assessment in queryset:
-                latest_revision = assessment.revisions.order_by("-created_at").first()
-                if latest_revision:
-                    latest_revision = latest_revision.as_object()
-                    # set the assessment's details to that of the latest revision
-                    assessment.title = latest_revision.title
-                    assessment.slug = latest_revision.slug
-                    assessment.version = latest_revision.version
-                    assessment.locale = latest_revision.locale
-                    assessment.tags = latest_revision.tags
-                    assessment.high_result_page = latest_revision.high_result_page
-                    assessment.high_inflection = latest_revision.high_inflection
-                    assessment.medium_result_page = latest_revision.medium_result_page
-                    assessment.medium_inflection = latest_revision.medium_inflection
-                    assessment.low_result_page = latest_revision.low_result_page
-                    assessment.skip_threshold = latest_revision.skip_threshold
-                    assessment.skip_high_result_page = (
-                        latest_revision.skip_high_result_page
-                    )
-                    assessment.generic_error = latest_revision.generic_error
-                    assessment.questions = latest_revision.questions
+            queryset = self.get_latest_revision_queryset()
 
         else:
             queryset = Assessment.objects.filter(live=True).order_by(
@@ -366,7 +856,7 @@ class AssessmentViewSet(BaseAPIViewSet):
                 ids.append(t.content_object_id)
             queryset = queryset.filter(id__in=ids)
 
-        return queryset
+        return self.filter_changed_since(queryset)
 
 
 api_router = WagtailAPIRouter("wagtailapi")
@@ -0,0 +1,124 @@
+"""
+A cache of rendered pages API detail responses.
+
+Rather than tracking every response that a change to a page could affect (its
+own detail responses, but also the parent and related page metadata of other
+pages), all cached responses share a generation token that is replaced
+whenever page content changes. Entries from older generations are never read
+again, and expire from the cache on their own.
+
+The ETags of detail responses are built from the same parts, plus the latest
+revision of the object, so that clients can revalidate a response they already
+have without it being rendered again.
+"""
+
+import hashlib
+import uuid
+from typing import Any
+
+from django.conf import settings  # type: ignore
+from django.core.cache import cache  # type: ignore
+from django.db.models.signals import post_delete  # type: ignore
+from rest_framework.request import Request  # type: ignore
+from wagtail.signals import (  # type: ignore
+    page_published,
+    page_unpublished,
+    post_page_move,
+)
+
+GENERATION_KEY = "pages-api:generation"
+
+
+def is_enabled() -> bool:
+    return settings.PAGES_API_CACHE_TIMEOUT > 0
+
+
+def get_generation() -> str:
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # add rather than set, so that concurrent requests agree on a generation
+        cache.add(GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def invalidate() -> None:
+    """
+    Invalidates all cached responses. The generation is replaced even when the
+    cache is disabled, since the ETags of detail responses are built from it.
+    """
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def get_cache_key(request: Request, pk: int) -> str:
+    """
+    The cache key for a detail response. The query parameters are included, since
+    they select the channel, message, and fields in the response, except for the
+    data__ parameters, which are only recorded with the page view. The host is
+    included because the response contains absolute URLs.
+    """
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        if not key.startswith("data__")
+        for value in values
+    )
+    digest = hashlib.sha256(
+        repr((request.build_absolute_uri("/"), params)).encode()
+    ).hexdigest()
+    return f"pages-api:{get_generation()}:{pk}:{digest}"
+
+
+def get_etag(request: Request, label: str, pk: int, *state: Any) -> str:
+    """
+    A strong ETag for a detail response of the `label` object with `pk`. It is
+    built from the same parts as the cache key, so it changes whenever a change
+    to any page could change the response, as well as from the `state` of the
+    object itself, such as its latest revision id and whether it is live, so
+    that it changes when the object is saved, published or unpublished.
+    """
+    parts = ":".join(str(part) for part in state)
+    digest = hashlib.sha256(
+        f"{get_cache_key(request, pk)}:{label}:{parts}".encode()
+    ).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def get_page_response(request: Request, pk: int) -> tuple[Any, int | None] | None:
+    """
+    Returns the cached (data, revision_id) for this detail request, or None
+    """
+    if not is_enabled():
+        return None
+    return cache.get(get_cache_key(request, pk))
+
+
+def set_page_response(
+    request: Request, pk: int, data: Any, revision_id: int | None
+) -> None:
+    """
+    Caches a detail response. The latest revision id of the page is stored with
+    it, so that page views can be recorded on cache hits without loading the page.
+    """
+    if is_enabled():
+        cache.set(
+            get_cache_key(request, pk),
+            (data, revision_id),
+            settings.PAGES_API_CACHE_TIMEOUT,
+        )
+
+
+def invalidate_on_signal(sender: Any, **kwargs: Any) -> None:
+    invalidate()
+
+
+page_published.connect(invalidate_on_signal, dispatch_uid="pages_api_cache_published")
+page_unpublished.connect(
+    invalidate_on_signal, dispatch_uid="pages_api_cache_unpublished"
+)
+post_page_move.connect(invalidate_on_signal, dispatch_uid="pages_api_cache_moved")
+post_delete.connect(
+    invalidate_on_signal,
+    sender="home.ContentPage",
+    dispatch_uid="pages_api_cache_deleted",
+)
@@ -0,0 +1,80 @@
+"""
+Tombstones for the changed_since feed of the content APIs.
+
+With the `changed_since` query parameter, the pages, ordered content, assessment
+and WhatsApp template listings only return the objects that were published after
+that time. Objects that were unpublished or deleted can't show up in those
+listings, so a ContentTombstone is recorded for them instead, and listed next to
+the results, unless the object has been published again since.
+"""
+
+from datetime import datetime
+from typing import Any
+
+from django.apps import apps  # type: ignore
+from django.contrib.contenttypes.models import ContentType  # type: ignore
+from django.db.models import Model, QuerySet  # type: ignore
+from django.db.models.signals import post_delete  # type: ignore
+from django.utils import timezone  # type: ignore
+from wagtail.signals import page_unpublished, unpublished  # type: ignore
+
+FEED_MODELS = [
+    "home.ContentPage",
+    "home.OrderedContentSet",
+    "home.Assessment",
+    "home.WhatsAppTemplate",
+]
+
+
+def record_tombstone(instance: Model, action: str) -> None:
+    """
+    Records that `instance` was removed with `action`. Clients ignore tombstones
+    for objects they don't have, so deleted drafts don't need to be left out.
+    """
+    if instance._meta.label not in FEED_MODELS:
+        return
+    ContentTombstone = apps.get_model("home", "ContentTombstone")
+    ContentTombstone.objects.update_or_create(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+        defaults={"action": action, "timestamp": timezone.now()},
+    )
+
+
+def get_tombstones(model: type[Model], since: datetime) -> QuerySet:
+    """
+    Returns the tombstones of the `model` objects removed after `since` that
+    aren't live again, oldest first
+    """
+    ContentTombstone = apps.get_model("home", "ContentTombstone")
+    return (
+        ContentTombstone.objects.filter(
+            content_type=ContentType.objects.get_for_model(model),
+            timestamp__gt=since,
+        )
+        .exclude(object_id__in=model.objects.filter(live=True).values("pk"))
+        .order_by("timestamp")
+    )
+
+
+def record_unpublished(sender: Any, instance: Model, **kwargs: Any) -> None:
+    record_tombstone(instance, "unpublished")
+
+
+def record_deleted(sender: Any, instance: Model, **kwargs: Any) -> None:
+    record_tombstone(instance, "deleted")
+
+
+def connect_signals() -> None:
+    """
+    Records tombstones when feed objects are unpublished or deleted. Called when
+    the app is ready.
+    """
+    page_unpublished.connect(
+        record_unpublished, dispatch_uid="change_feed_page_unpublished"
+    )
+    unpublished.connect(record_unpublished, dispatch_uid="change_feed_unpublished")
+    for label in FEED_MODELS:
+        post_delete.connect(
+            record_deleted, sender=label, dispatch_uid=f"change_feed_deleted_{label}"
+        )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+
+from home.models import PageView
+from home.views import data_filter
+
+
+class Command(BaseCommand):
+    help = (
+        "Shows the query plans for filtering page views on data keys, both as key "
+        "lookups, which can't use an index, and as the containment lookups that "
+        "the page views API uses, which can use the GIN index on data. "
+        "eg. explain_page_view_filters data__contact_uuid=<uuid>"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("filters", nargs="+", help="data__<key>=<value> filters")
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Run the queries, and show their actual timings",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Containment lookups are only supported on PostgreSQL")
+
+        key_lookups = Q()
+        containment = Q()
+        for arg in options["filters"]:
+            key, sep, value = arg.partition("=")
+            if not sep or not key.startswith("data__"):
+                raise CommandError(f"{arg} is not a data__<key>=<value> filter")
+            key_lookups &= Q(**{key: value})
+            containment &= data_filter(key, value)
+
+        for title, condition in [
+            ("Key lookup", key_lookups),
+            ("Containment", containment),
+        ]:
+            queryset = PageView.objects.filter(condition).order_by("timestamp")
+            self.stdout.write(f"{title}:")
+            self.stdout.write(queryset.explain(analyze=options["analyze"]))
+            self.stdout.write("")
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from home.page_view_rollups import get_last_rolled_up_id
+from home.partitions import (
+    PARTITIONED_MODELS,
+    PartitionError,
+    create_partitions,
+    drop_partitions,
+    is_partitioned,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the monthly partitions of the page view and page rating tables for "
+        "the coming months, and drops the partitions older than --keep-months, "
+        "archiving them to --archive-dir. Run this on a schedule, eg. every day."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="How many months after the current month to create partitions for",
+        )
+        parser.add_argument(
+            "--keep-months",
+            type=int,
+            default=None,
+            help="Drop the partitions that only hold rows from before this many "
+            "months ago. By default, no partitions are dropped.",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            default=None,
+            help="Write each partition to a gzipped CSV file in this directory "
+            "before dropping it",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning is only supported on PostgreSQL")
+        archive_dir = options["archive_dir"]
+        if archive_dir is not None and not Path(archive_dir).is_dir():
+            raise CommandError(f"Archive directory {archive_dir} does not exist")
+
+        for label in PARTITIONED_MODELS:
+            table = apps.get_model(label)._meta.db_table
+            if not is_partitioned(connection, table):
+                raise CommandError(f"{table} is not partitioned")
+            for name in create_partitions(connection, table, options["months_ahead"]):
+                self.stdout.write(f"Created partition {name}")
+            if options["keep_months"] is not None:
+                self.drop_partitions(label, table, options["keep_months"], archive_dir)
+
+    def drop_partitions(self, label, table, keep_months, archive_dir):
+        # Page views are only dropped once they're counted in the rollups
+        max_id = get_last_rolled_up_id() if label == "home.PageView" else None
+        try:
+            dropped = drop_partitions(
+                connection, table, keep_months, archive_dir, max_id=max_id
+            )
+        except PartitionError as e:
+            raise CommandError(
+                f"{e}, which haven't been rolled up yet. Run rollup_page_views "
+                f"before dropping partitions."
+            )
+        for name in dropped:
+            self.stdout.write(f"Dropped partition {name}")
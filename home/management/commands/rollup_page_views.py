@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from home.page_view_rollups import roll_up_page_views
+
+
+class Command(BaseCommand):
+    help = (
+        "Adds the page views recorded since the last run to the daily and monthly "
+        "page view rollups that the page view reports read. Run this on a schedule, "
+        "eg. every hour."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="How many page views to add to the rollups in each transaction",
+        )
+
+    def handle(self, *args, **options):
+        count = roll_up_page_views(batch_size=options["batch_size"])
+        self.stdout.write(f"Added {count} page views to the rollups")
@@ -0,0 +1,144 @@
+"""
+Per-channel message manifests for content pages.
+
+The pages API returns a page's channel messages one at a time, with the message
+count and, for WhatsApp, a flattened version of the message. A page's manifest
+holds the messages of each channel already in the shape the API returns them,
+so that serving `?<channel>&message=N` is a list lookup. It is built from the
+message bodies whenever the page is saved, and on the fly for page objects that
+weren't loaded from the page table. Manifests built for the latest revision of a
+page in QA mode are kept in memory, so that repeat requests share them.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any
+
+Message = dict[str, Any]
+Manifest = dict[str, list[Any]]
+
+CHANNELS = ["whatsapp", "sms", "ussd", "messenger", "viber"]
+
+MESSAGE_BODY_FIELDS = {f"{channel}_body" for channel in CHANNELS}
+
+REVISION_MANIFEST_CACHE_SIZE = 256
+
+_revision_manifests: OrderedDict[tuple[int, datetime], Manifest] = OrderedDict()
+_revision_manifests_lock = threading.Lock()
+
+
+def flatten_whatsapp_message(message: Message) -> Message:
+    """
+    Returns a WhatsApp message block with the variation messages flattened and with
+    list items in both their old and new formats. The raw message isn't modified,
+    and the parts of it that don't change are shared rather than copied.
+    """
+    value = message["value"]
+    flattened = {
+        **value,
+        "variation_messages": [
+            {
+                "profile_field": var["value"]["variation_restrictions"][0]["type"],
+                "value": var["value"]["variation_restrictions"][0]["value"],
+                "message": var["value"]["message"],
+            }
+            for var in value.get("variation_messages", [])
+        ],
+    }
+
+    # For backwards compatibility we are exposing the new format under list_items_v2, and maintaining list_items the way it was.
+    # For example:
+    # New Format:
+    # {
+    #     "id": "179bf4be-2bea-49db-8558-51f7da8b888f",
+    #     "type": "next_message",
+    #     "value": {
+    #         "title": "English"
+    #     }
+    # }
+    #
+    # Old Format:
+    # {
+    #     "id": "8db577c1-67ab-49e1-825a-960b891374f4",
+    #     "type": "item",
+    #     "value": "English"
+    # }
+    if value.get("list_items"):
+        flattened["list_items_v2"] = value["list_items"]
+        flattened["list_items"] = [
+            {"id": item["id"], "type": "item", "value": item["value"]["title"]}
+            for item in value["list_items"]
+        ]
+
+    return {**message, "value": flattened}
+
+
+def build_message_manifest(page: Any) -> Manifest:
+    """
+    Builds the manifest of a page from its message bodies. The bodies are read
+    with get_prep_value, which gives new blocks the ids that they are saved with.
+    """
+    manifest: Manifest = {}
+    for channel in CHANNELS:
+        body = getattr(page, f"{channel}_body")
+        messages = body.get_prep_value() if body else []
+        if channel == "whatsapp":
+            manifest[channel] = [flatten_whatsapp_message(m) for m in messages]
+        else:
+            manifest[channel] = [m["value"] for m in messages]
+    return manifest
+
+
+def get_message_manifest(page: Any) -> Manifest:
+    """
+    Returns the manifest of a page, building it if the page doesn't have one
+    """
+    if not page.message_manifest:
+        page.message_manifest = build_message_manifest(page)
+    return page.message_manifest
+
+
+def get_revision_message_manifest(
+    page: Any, revision_id: int, revision_created_at: datetime
+) -> Manifest:
+    """
+    Returns the manifest of a page loaded from the revision with `revision_id`.
+
+    The message bodies of a revision never change, so its manifest is only built
+    once per process, and is shared between requests. Each call returns a copy of
+    the messages, so that changing them doesn't change them for other requests.
+    The revision's creation time is part of the key, in case a revision id is
+    reused, eg. after restoring a database backup.
+    """
+    key = (revision_id, revision_created_at)
+    with _revision_manifests_lock:
+        manifest = _revision_manifests.get(key)
+        if manifest is not None:
+            _revision_manifests.move_to_end(key)
+            return copy_message_manifest(manifest)
+
+    manifest = build_message_manifest(page)
+    with _revision_manifests_lock:
+        _revision_manifests[key] = manifest
+        while len(_revision_manifests) > REVISION_MANIFEST_CACHE_SIZE:
+            _revision_manifests.popitem(last=False)
+    return copy_message_manifest(manifest)
+
+
+def copy_message_manifest(manifest: Manifest) -> Manifest:
+    """
+    Returns a copy of a manifest with a shallow copy of each message, and of the
+    value of each WhatsApp message. The rest of each message is shared.
+    """
+    return {
+        channel: [copy_message(message) for message in messages]
+        for channel, messages in manifest.items()
+    }
+
+
+def copy_message(message: Any) -> Any:
+    message = dict(message)
+    if isinstance(message.get("value"), dict):
+        message["value"] = dict(message["value"])
+    return message
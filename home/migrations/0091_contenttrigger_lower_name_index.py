@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:37
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0090_alter_orderedcontentset_pages"),
+        ("taggit", "0005_auto_20220424_2025"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="contenttrigger",
+            index=models.Index(
+                django.db.models.functions.text.Lower("name"),
+                name="home_contenttrigger_lower_name",
+            ),
+        ),
+        # taggit's Tag model isn't ours, so the matching index for the pages API
+        # tag filter is created directly.
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS home_taggit_tag_lower_name "
+            "ON taggit_tag (LOWER(name))",
+            "DROP INDEX IF EXISTS home_taggit_tag_lower_name",
+        ),
+    ]
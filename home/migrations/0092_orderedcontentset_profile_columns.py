@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:47
+
+from django.db import migrations, models
+
+
+def set_profile_columns(apps, schema_editor):
+    OrderedContentSet = apps.get_model("home", "OrderedContentSet")
+
+    ordered_content_sets = []
+    for ocs in OrderedContentSet.objects.all().iterator():
+        values = {item["type"]: item["value"] for item in ocs.profile_fields.raw_data}
+        ocs.profile_gender = values.get("gender") or ""
+        ocs.profile_age = values.get("age") or ""
+        ocs.profile_relationship = values.get("relationship") or ""
+        ordered_content_sets.append(ocs)
+
+    OrderedContentSet.objects.bulk_update(
+        ordered_content_sets,
+        ["profile_gender", "profile_age", "profile_relationship"],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0091_contenttrigger_lower_name_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderedcontentset",
+            name="profile_age",
+            field=models.CharField(
+                blank=True, db_index=True, default="", editable=False, max_length=255
+            ),
+        ),
+        migrations.AddField(
+            model_name="orderedcontentset",
+            name="profile_gender",
+            field=models.CharField(
+                blank=True, db_index=True, default="", editable=False, max_length=255
+            ),
+        ),
+        migrations.AddField(
+            model_name="orderedcontentset",
+            name="profile_relationship",
+            field=models.CharField(
+                blank=True, db_index=True, default="", editable=False, max_length=255
+            ),
+        ),
+        migrations.RunPython(
+            code=set_profile_columns, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:57
+
+from django.db import migrations, models
+
+# A copy of home.message_manifest as it was when this migration was written, so
+# that later changes to how manifests are built don't change this migration
+CHANNELS = ["whatsapp", "sms", "ussd", "messenger", "viber"]
+
+MESSAGE_BODY_FIELDS = {f"{channel}_body" for channel in CHANNELS}
+
+
+def flatten_whatsapp_message(message):
+    value = message["value"]
+    flattened = {
+        **value,
+        "variation_messages": [
+            {
+                "profile_field": var["value"]["variation_restrictions"][0]["type"],
+                "value": var["value"]["variation_restrictions"][0]["value"],
+                "message": var["value"]["message"],
+            }
+            for var in value.get("variation_messages", [])
+        ],
+    }
+    if value.get("list_items"):
+        flattened["list_items_v2"] = value["list_items"]
+        flattened["list_items"] = [
+            {"id": item["id"], "type": "item", "value": item["value"]["title"]}
+            for item in value["list_items"]
+        ]
+    return {**message, "value": flattened}
+
+
+def build_message_manifest(page):
+    manifest = {}
+    for channel in CHANNELS:
+        body = getattr(page, f"{channel}_body")
+        messages = list(body.raw_data) if body else []
+        if channel == "whatsapp":
+            manifest[channel] = [flatten_whatsapp_message(m) for m in messages]
+        else:
+            manifest[channel] = [m["value"] for m in messages]
+    return manifest
+
+
+def build_message_manifests(apps, schema_editor):
+    ContentPage = apps.get_model("home", "ContentPage")
+
+    pages = []
+    for page in ContentPage.objects.only("id", *MESSAGE_BODY_FIELDS).iterator():
+        page.message_manifest = build_message_manifest(page)
+        pages.append(page)
+        if len(pages) == 100:
+            ContentPage.objects.bulk_update(pages, ["message_manifest"])
+            pages = []
+    ContentPage.objects.bulk_update(pages, ["message_manifest"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0092_orderedcontentset_profile_columns"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contentpage",
+            name="message_manifest",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(
+            code=build_message_manifests, reverse_code=migrations.RunPython.noop
+        ),
+    ]
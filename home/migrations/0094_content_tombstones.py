@@ -0,0 +1,89 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("home", "0093_contentpage_message_manifest"),
+        ("wagtailcore", "0089_log_entry_data_json_null_to_object"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContentTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField()),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("unpublished", "Unpublished"),
+                            ("deleted", "Deleted"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("timestamp", models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="assessment",
+            index=models.Index(
+                fields=["last_published_at"], name="home_assess_last_pu_80bd8e_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="orderedcontentset",
+            index=models.Index(
+                fields=["last_published_at"], name="home_ordere_last_pu_faa274_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="whatsapptemplate",
+            index=models.Index(
+                fields=["last_published_at"], name="home_whatsa_last_pu_58b30a_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="contenttombstone",
+            name="content_type",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                to="contenttypes.contenttype",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contenttombstone",
+            index=models.Index(
+                fields=["content_type", "timestamp"],
+                name="home_conten_content_377f3d_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="contenttombstone",
+            constraint=models.UniqueConstraint(
+                fields=("content_type", "object_id"),
+                name="home_contenttombstone_unique_object",
+            ),
+        ),
+        # Wagtail's Page model isn't ours, so the index for the changed_since feed
+        # of the pages API is created directly.
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS home_page_last_published_at "
+            "ON wagtailcore_page (last_published_at)",
+            "DROP INDEX IF EXISTS home_page_last_published_at",
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0094_content_tombstones"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PageViewRollupState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_page_view_id", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="PageViewMonthlyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("platform", models.CharField(max_length=20)),
+                ("message", models.IntegerField(blank=True, default=None, null=True)),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "page",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="home.contentpage",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+                "indexes": [
+                    models.Index(fields=["date"], name="home_pagevi_date_f8a81b_idx"),
+                    models.Index(
+                        fields=["page", "date"], name="home_pagevi_page_id_837d2f_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="PageViewDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("platform", models.CharField(max_length=20)),
+                ("message", models.IntegerField(blank=True, default=None, null=True)),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "page",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="home.contentpage",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+                "indexes": [
+                    models.Index(fields=["date"], name="home_pagevi_date_a179b2_idx"),
+                    models.Index(
+                        fields=["page", "date"], name="home_pagevi_page_id_5881c1_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_page_view_counters(apps, schema_editor):
+    PageView = apps.get_model("home", "PageView")
+    PageViewCounter = apps.get_model("home", "PageViewCounter")
+    PageViewRollupState = apps.get_model("home", "PageViewRollupState")
+
+    # Only the page views that are already rolled up, the rest are added to the
+    # counters the next time they are rolled up
+    state = PageViewRollupState.objects.first()
+    if state is None:
+        return
+    counters = {}
+    for row in (
+        PageView.objects.filter(id__lte=state.last_page_view_id)
+        .values("page_id", "platform")
+        .annotate(count=models.Count("id"), last=models.Max("timestamp"))
+        .order_by()
+    ):
+        counter = counters.setdefault(
+            row["page_id"], PageViewCounter(page_id=row["page_id"], platforms={})
+        )
+        counter.count += row["count"]
+        counter.platforms[row["platform"]] = row["count"]
+        if counter.last_viewed_at is None or row["last"] > counter.last_viewed_at:
+            counter.last_viewed_at = row["last"]
+    PageViewCounter.objects.bulk_create(counters.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0095_page_view_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PageViewCounter",
+            fields=[
+                (
+                    "page",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="view_count",
+                        serialize=False,
+                        to="home.contentpage",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(db_index=True, default=0)),
+                ("last_viewed_at", models.DateTimeField(blank=True, null=True)),
+                ("platforms", models.JSONField(blank=True, default=dict)),
+            ],
+        ),
+        migrations.RunPython(
+            code=create_page_view_counters, reverse_code=migrations.RunPython.noop
+        ),
+    ]
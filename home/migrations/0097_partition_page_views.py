@@ -0,0 +1,208 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:43
+
+import datetime
+
+from django.db import migrations, transaction
+
+# The SQL is kept in this migration rather than imported from home.partitions, so
+# that later changes to that module don't change what this migration does
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def is_partitioned(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid))",
+            [table],
+        )
+        return cursor.fetchone()[0]
+
+
+def add_missing_field_indexes(schema_editor, model):
+    """
+    Creates the indexes of fields with db_index that the table doesn't have, with
+    the names Django gives them, so that the partitioned table has them too.
+    Migration 0032 only added the page view timestamp index to the migration
+    state.
+    """
+    connection = schema_editor.connection
+    qn = connection.ops.quote_name
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+        indexed = {tuple(c["columns"]) for c in constraints.values() if c["index"]}
+        for field in model._meta.local_fields:
+            if field.db_index and not field.unique and (field.column,) not in indexed:
+                name = schema_editor._create_index_name(table, [field.column])
+                cursor.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {qn(name)} "
+                    f"ON {qn(table)} ({qn(field.column)})"
+                )
+
+
+def prepare_table(connection, table, first_month, concurrently=True):
+    """
+    Adds what attaching `table` as the first partition of a partitioned table
+    needs, while it can still be read and written: a unique index on
+    (id, timestamp) for the primary key, and a CHECK constraint matching the
+    partition's bound, so that attaching it doesn't scan it. The constraint is
+    added as NOT VALID and then validated, which doesn't block writes.
+    """
+    qn = connection.ops.quote_name
+    legacy = f"{table}_legacy"
+    concurrently = "CONCURRENTLY " if concurrently else ""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE UNIQUE INDEX {concurrently}IF NOT EXISTS {qn(f'{legacy}_pkey')} "
+            f"ON {qn(table)} (id, timestamp)"
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} "
+            f"DROP CONSTRAINT IF EXISTS {qn(f'{legacy}_bound')}"
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(f'{legacy}_bound')} "
+            f"CHECK (timestamp IS NOT NULL AND timestamp < %s) NOT VALID",
+            [first_month.isoformat()],
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} VALIDATE CONSTRAINT {qn(f'{legacy}_bound')}"
+        )
+
+
+def partition_table(connection, table, today, months_ahead=3):
+    """
+    Replaces `table` with a table partitioned by month on its timestamp, which
+    has the existing table as its first partition, up to the start of next month,
+    a partition for each of the `months_ahead` months after that, and a default
+    partition. prepare_table must have been run on `table` first.
+
+    The partitioned table gets the names of the primary key, indexes and foreign
+    keys of the existing table, so that they match the migration state, and the
+    indexes of the existing table get a `_legacy` suffix. The matching indexes
+    and foreign keys of the existing table become their partitions, rather than
+    being built again.
+    """
+    qn = connection.ops.quote_name
+    legacy = f"{table}_legacy"
+    sequence = f"{table}_partitioned_id_seq"
+    first_month = add_months(today, 1)
+
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+        [primary_key] = [n for n, c in constraints.items() if c["primary_key"]]
+        foreign_keys = {n: c for n, c in constraints.items() if c["foreign_key"]}
+        # The definitions of the other indexes, which create them on the
+        # partitioned table once it has taken over the name of the table
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s "
+            "AND indexname NOT IN (%s, %s)",
+            [table, primary_key, f"{legacy}_pkey"],
+        )
+        indexes = cursor.fetchall()
+
+        cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}")
+        for name, _definition in indexes:
+            legacy_name = f"{name[:56]}_legacy"
+            cursor.execute(f"ALTER INDEX {qn(name)} RENAME TO {qn(legacy_name)}")
+        # The partitions can't generate their own ids, the partitioned table does
+        # that, and their primary key has to include the timestamp too
+        cursor.execute(f"ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(primary_key)}")
+        cursor.execute(
+            f"ALTER TABLE {qn(legacy)} ADD CONSTRAINT {qn(f'{legacy}_pkey')} "
+            f"PRIMARY KEY USING INDEX {qn(f'{legacy}_pkey')}"
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(legacy)} ALTER COLUMN id DROP IDENTITY IF EXISTS"
+        )
+        cursor.execute(f"ALTER TABLE {qn(legacy)} ALTER COLUMN id DROP DEFAULT")
+
+        cursor.execute(
+            f"CREATE TABLE {qn(table)} (LIKE {qn(legacy)}) "
+            f"PARTITION BY RANGE (timestamp)"
+        )
+        cursor.execute(f"CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.id")
+        next_id = f"SELECT COALESCE(MAX(id), 0) + 1 FROM {qn(legacy)}"  # noqa: S608
+        cursor.execute(next_id)
+        cursor.execute("SELECT setval(%s, %s, false)", [sequence, cursor.fetchone()[0]])
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ALTER COLUMN id "
+            f"SET DEFAULT nextval('{sequence}')"
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(primary_key)} "
+            f"PRIMARY KEY (id, timestamp)"
+        )
+        for _name, definition in indexes:
+            cursor.execute(definition)
+        for name, foreign_key in foreign_keys.items():
+            [column] = foreign_key["columns"]
+            target_table, target_column = foreign_key["foreign_key"]
+            cursor.execute(
+                f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} "
+                f"FOREIGN KEY ({qn(column)}) "
+                f"REFERENCES {qn(target_table)} ({qn(target_column)}) "
+                f"DEFERRABLE INITIALLY DEFERRED"
+            )
+
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(legacy)} "
+            f"FOR VALUES FROM (MINVALUE) TO (%s)",
+            [first_month.isoformat()],
+        )
+        # The partition bound makes the CHECK constraint redundant
+        cursor.execute(
+            f"ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(f'{legacy}_bound')}"
+        )
+        month = first_month
+        while month <= add_months(today, months_ahead):
+            cursor.execute(
+                f"CREATE TABLE {qn(f'{table}_p{month:%Y%m}')} PARTITION OF {qn(table)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [month.isoformat(), add_months(month, 1).isoformat()],
+            )
+            month = add_months(month, 1)
+        cursor.execute(
+            f"CREATE TABLE {qn(table + '_default')} PARTITION OF {qn(table)} DEFAULT"
+        )
+
+
+def partition_tables(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    for label in ["home.PageView", "home.ContentPageRating"]:
+        model = apps.get_model(label)
+        table = model._meta.db_table
+        if is_partitioned(connection, table):
+            continue
+        # This migration isn't atomic, so that the indexes and constraint can be
+        # built without holding a lock that blocks writes. Only replacing the
+        # table takes an exclusive lock, and it doesn't scan the table.
+        add_missing_field_indexes(schema_editor, model)
+        prepare_table(connection, table, add_months(today, 1))
+        with transaction.atomic(using=connection.alias):
+            partition_table(connection, table, today)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("home", "0096_page_view_counters"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            code=partition_tables, reverse_code=migrations.RunPython.noop
+        ),
+    ]
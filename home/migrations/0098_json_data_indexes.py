@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0097_partition_page_views"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pageview",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["data"],
+                name="home_pageview_data_gin",
+                opclasses=["jsonb_path_ops"],
+            ),
+        ),
+    ]
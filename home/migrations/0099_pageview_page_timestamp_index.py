@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0098_json_data_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pageview",
+            index=models.Index(
+                fields=["page", "timestamp"], name="home_pagevi_page_id_b43380_idx"
+            ),
+        ),
+    ]
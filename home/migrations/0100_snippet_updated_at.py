@@ -0,0 +1,60 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0099_pageview_page_timestamp_index"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="assessment",
+            name="home_assess_last_pu_80bd8e_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="orderedcontentset",
+            name="home_ordere_last_pu_faa274_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="whatsapptemplate",
+            name="home_whatsa_last_pu_58b30a_idx",
+        ),
+        # Existing rows get the time of the migration, so the next changed_since
+        # poll lists all of them once
+        migrations.AddField(
+            model_name="assessment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="orderedcontentset",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="whatsapptemplate",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="assessment",
+            index=models.Index(
+                fields=["updated_at"], name="home_assess_updated_c55099_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="orderedcontentset",
+            index=models.Index(
+                fields=["updated_at"], name="home_ordere_updated_7e2d4f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="whatsapptemplate",
+            index=models.Index(
+                fields=["updated_at"], name="home_whatsa_updated_112aa3_idx"
+            ),
+        ),
+    ]
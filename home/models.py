@@ -3,9 +3,12 @@ import re
 
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxLengthValidator
 from django.db import models
+from django.db.models.functions import Lower
 from django.forms import CheckboxSelectMultiple
 from django.template.defaultfilters import truncatechars
 from django.urls import reverse
@@ -48,6 +51,9 @@ from wagtail.snippets.blocks import SnippetChooserBlock
 from wagtail_content_import.models import ContentImportMixin
 from wagtailmedia.blocks import AbstractMediaChooserBlock
 
+from . import api_cache
+from .message_manifest import MESSAGE_BODY_FIELDS, build_message_manifest
+from .page_views import record_page_view
 from .panels import PageRatingPanel
 from .whatsapp import (
     TemplateSubmissionException,
@@ -452,7 +458,8 @@ class ContentPageIndex(UniqueSlugMixin, Page):
 
     @property
     def has_children(self):
-        return self.get_children_count() > 0
+        # treebeard keeps the number of children on the page itself
+        return self.numchild > 0
 
     api_fields = [
         APIField("title"),
@@ -471,6 +478,10 @@ class ContentTrigger(TagBase):
     class Meta:
         verbose_name = "content trigger"
         verbose_name_plural = "content triggers"
+        indexes = [
+            # Used for the case insensitive trigger filter in the pages API
+            models.Index(Lower("name"), name="home_contenttrigger_lower_name"),
+        ]
 
 
 class TriggeredContent(ItemBase):
@@ -698,6 +709,9 @@ class ContentPage(UniqueSlugMixin, Page, ContentImportMixin):
         use_json_field=True,
     )
 
+    # The messages of each channel in the shape the API returns them, built on save
+    message_manifest = models.JSONField(default=dict, blank=True, editable=False)
+
     # viber panels
     viber_panels = [
         MultiFieldPanel(
@@ -755,7 +769,8 @@ class ContentPage(UniqueSlugMixin, Page, ContentImportMixin):
 
     @property
     def has_children(self):
-        return self.get_children_count() > 0
+        # treebeard keeps the number of children on the page itself
+        return self.numchild > 0
 
     @property
     def page_rating(self):
@@ -768,7 +783,7 @@ class ContentPage(UniqueSlugMixin, Page, ContentImportMixin):
     @property
     def latest_revision_rating(self):
         return self._calc_avg_rating(
-            self.ratings.filter(revision=self.get_latest_revision())
+            self.ratings.filter(revision_id=self.latest_revision_id)
         )
 
     @property
@@ -791,7 +806,7 @@ class ContentPage(UniqueSlugMixin, Page, ContentImportMixin):
         return [v["value"] for v in example_values]
 
     def create_whatsapp_template_name(self) -> str:
-        return f"{self.whatsapp_template_prefix}_{self.get_latest_revision().pk}"
+        return f"{self.whatsapp_template_prefix}_{self.latest_revision_id}"
 
     def get_descendants(self, inclusive=False):
         return ContentPage.objects.descendant_of(self, inclusive)
@@ -807,7 +822,12 @@ class ContentPage(UniqueSlugMixin, Page, ContentImportMixin):
             return f"{helpful}/{ratings.count()} ({percentage}%)"
         return "(no ratings yet)"
 
-    def save_page_view(self, query_params, platform=None):
+    @staticmethod
+    def get_page_view_fields(query_params, platform=None):
+        """
+        The fields of a PageView for a request with these query parameters, other
+        than the page and revision
+        """
         if not platform and query_params:
             if "whatsapp" in query_params:
                 platform = "whatsapp"
@@ -829,7 +849,6 @@ class ContentPage(UniqueSlugMixin, Page, ContentImportMixin):
                 data[key] = value
 
         page_view = {
-            "revision": self.get_latest_revision(),
             "data": data,
             "platform": f"{platform}",
         }
@@ -837,7 +856,19 @@ class ContentPage(UniqueSlugMixin, Page, ContentImportMixin):
         if "message" in query_params and query_params["message"].isdigit():
             page_view["message"] = query_params["message"]
 
-        self.views.create(**page_view)
+        return page_view
+
+    def save_page_view(self, query_params, platform=None):
+        # latest_revision_id is kept up to date by save_revision, so attributing the
+        # view to the latest revision doesn't need to fetch the revision. Only the ids
+        # are kept, since page views may be buffered for a while.
+        record_page_view(
+            PageView(
+                page_id=self.pk,
+                revision_id=self.latest_revision_id,
+                **self.get_page_view_fields(query_params, platform),
+            )
+        )
 
     @property
     def quick_reply_buttons(self):
@@ -941,6 +972,21 @@ class ContentPage(UniqueSlugMixin, Page, ContentImportMixin):
 
         return page_links, orderedcontentset_links, whatsapp_template_links
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or MESSAGE_BODY_FIELDS & set(update_fields):
+            self.message_manifest = build_message_manifest(self)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "message_manifest"}
+        return super().save(*args, **kwargs)
+
+    def serializable_data(self):
+        data = super().serializable_data()
+        # Revisions don't keep a manifest, since it's derived from the message
+        # bodies, and saving a revision doesn't save the page
+        data.pop("message_manifest", None)
+        return data
+
     def save_revision(
         self,
         user=None,
@@ -974,6 +1020,8 @@ class ContentPage(UniqueSlugMixin, Page, ContentImportMixin):
         if template_name:
             revision.content["whatsapp_template_name"] = template_name
             revision.save(update_fields=["content"])
+        # The latest revision is part of the pages API response
+        api_cache.invalidate()
         return revision
 
     def short_description(description):
@@ -1164,6 +1212,9 @@ class OrderedContentSet(
     name = models.CharField(
         max_length=255, help_text="The name of the ordered content set."
     )
+    # Changed on every save, including saves that don't publish a revision, such
+    # as imports. Used for the changed_since feed and the ETags of the API.
+    updated_at = models.DateTimeField(auto_now=True)
 
     def get_gender(self):
         for item in self.get_latest_revision_as_object().profile_fields.raw_data:
@@ -1261,6 +1312,17 @@ class OrderedContentSet(
         default=[],
         blank=True,
     )
+    # Copies of the profile_fields values, kept up to date on save, so that the API
+    # can filter on them in the database
+    profile_gender = models.CharField(
+        max_length=255, blank=True, default="", db_index=True, editable=False
+    )
+    profile_age = models.CharField(
+        max_length=255, blank=True, default="", db_index=True, editable=False
+    )
+    profile_relationship = models.CharField(
+        max_length=255, blank=True, default="", db_index=True, editable=False
+    )
     search_fields = [
         index.SearchField("name"),
         index.SearchField("get_gender"),
@@ -1369,10 +1431,29 @@ class OrderedContentSet(
     class Meta:  # noqa
         verbose_name = "Ordered Content Set"
         verbose_name_plural = "Ordered Content Sets"
+        indexes = [
+            # Used for the changed_since feed of the ordered content API
+            models.Index(fields=["updated_at"]),
+        ]
 
     def clean(self):
         return super().clean(OrderedContentSet)
 
+    def save(self, *args, **kwargs):
+        values = {item["type"]: item["value"] for item in self.profile_fields.raw_data}
+        self.profile_gender = values.get("gender") or ""
+        self.profile_age = values.get("age") or ""
+        self.profile_relationship = values.get("relationship") or ""
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "profile_fields" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {
+                "profile_gender",
+                "profile_age",
+                "profile_relationship",
+            }
+        return super().save(*args, **kwargs)
+
     def language_code(self):
         return self.locale.language_code
 
@@ -1414,6 +1495,97 @@ class PageView(models.Model):
     message = models.IntegerField(blank=True, default=None, null=True)
     data = models.JSONField(default=dict, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Serves containment lookups on any key of data, see PageViewViewSet
+            GinIndex(
+                fields=["data"],
+                name="home_pageview_data_gin",
+                opclasses=["jsonb_path_ops"],
+            ),
+            # Finds the latest view of each page, see PageViewViewSet
+            models.Index(fields=["page", "timestamp"]),
+        ]
+
+
+class PageViewRollup(models.Model):
+    """
+    The number of page views of a page on a platform, for a message, in a period
+    starting on `date`. See home.page_view_rollups.
+    """
+
+    date = models.DateField()
+    page = models.ForeignKey(ContentPage, related_name="+", on_delete=models.CASCADE)
+    platform = models.CharField(max_length=20)
+    message = models.IntegerField(blank=True, default=None, null=True)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class PageViewDailyRollup(PageViewRollup):
+    class Meta(PageViewRollup.Meta):
+        indexes = [models.Index(fields=["date"]), models.Index(fields=["page", "date"])]
+
+
+class PageViewMonthlyRollup(PageViewRollup):
+    class Meta(PageViewRollup.Meta):
+        indexes = [models.Index(fields=["date"]), models.Index(fields=["page", "date"])]
+
+
+class PageViewRollupState(models.Model):
+    """
+    The id of the last page view that has been added to the rollups
+    """
+
+    last_page_view_id = models.BigIntegerField(default=0)
+
+
+class PageViewCounter(models.Model):
+    """
+    The total number of page views of a page, when it was last viewed, and the
+    number of page views on each platform. Kept up to date with the rollups, see
+    home.page_view_rollups.
+    """
+
+    page = models.OneToOneField(
+        ContentPage,
+        primary_key=True,
+        related_name="view_count",
+        on_delete=models.CASCADE,
+    )
+    count = models.PositiveIntegerField(default=0, db_index=True)
+    last_viewed_at = models.DateTimeField(blank=True, null=True)
+    platforms = models.JSONField(default=dict, blank=True)
+
+
+class ContentTombstone(models.Model):
+    """
+    Records that a published content page, ordered content set, assessment or
+    WhatsApp template was unpublished or deleted, so that the changed_since feed
+    of the content APIs can tell clients to remove it. There is one tombstone per
+    object, for the last time it was removed.
+    """
+
+    class Action(models.TextChoices):
+        UNPUBLISHED = "unpublished", _("Unpublished")
+        DELETED = "deleted", _("Deleted")
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    action = models.CharField(max_length=20, choices=Action.choices)
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id"],
+                name="home_contenttombstone_unique_object",
+            ),
+        ]
+        indexes = [models.Index(fields=["content_type", "timestamp"])]
+
 
 class AnswerBlock(blocks.StructBlock):
     answer = blocks.TextBlock(help_text="The choice shown to the user for this option")
@@ -1496,6 +1668,10 @@ class Assessment(DraftStateMixin, RevisionMixin, index.Indexed, ClusterableModel
     class Meta:
         verbose_name = "CMS Form"
         verbose_name_plural = "CMS Forms"
+        indexes = [
+            # Used for the changed_since feed of the assessment API
+            models.Index(fields=["updated_at"]),
+        ]
 
     title = models.CharField(max_length=255)
     slug = models.SlugField(
@@ -1509,6 +1685,9 @@ class Assessment(DraftStateMixin, RevisionMixin, index.Indexed, ClusterableModel
     )
     locale = models.ForeignKey(to=Locale, on_delete=models.CASCADE)
     tags = ClusterTaggableManager(through=AssessmentTag, blank=True)
+    # Changed on every save, including saves that don't publish a revision, such
+    # as imports. Used for the changed_since feed and the ETags of the API.
+    updated_at = models.DateTimeField(auto_now=True)
     high_result_page = models.ForeignKey(
         ContentPage,
         related_name="assessment_high",
@@ -1632,6 +1811,10 @@ class WhatsAppTemplate(
     class Meta:  # noqa
         verbose_name = "WhatsApp Template"
         verbose_name_plural = "WhatsApp Templates"
+        indexes = [
+            # Used for the changed_since feed of the WhatsApp template API
+            models.Index(fields=["updated_at"]),
+        ]
 
     class Category(models.TextChoices):
         UTILITY = "UTILITY", _("Utility")
@@ -1705,6 +1888,9 @@ class WhatsAppTemplate(
         max_length=1024,
         default="",
     )
+    # Changed on every save, including saves that don't publish a revision, such
+    # as imports. Used for the changed_since feed and the ETags of the API.
+    updated_at = models.DateTimeField(auto_now=True)
 
     search_fields = [
         index.SearchField("locale"),
@@ -1866,4 +2052,4 @@ class WhatsAppTemplate(
         )
 
     def create_whatsapp_template_name(self) -> str:
-        return f"{self.prefix}_{self.get_latest_revision().pk}"
+        return f"{self.prefix}_{self.latest_revision_id}"
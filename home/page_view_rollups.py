@@ -0,0 +1,234 @@
+"""
+Daily and monthly rollups of page views.
+
+The page view reports used to aggregate the whole PageView table every time they
+were shown. Instead, the rollup_page_views management command adds the page
+views recorded since it last ran to daily and monthly counts per page, platform
+and message, and remembers the id of the last page view it added. Reports read
+the rollups, plus the page views recorded since the command last ran, so they
+are always up to date however often the command is scheduled.
+
+Page views are only rolled up once they are ROLLUP_DELAY old, so that page views
+with lower ids that are still being written by another transaction aren't
+skipped.
+
+The same run also updates the PageViewCounter of each page, which holds its total
+number of page views, per platform, and when it was last viewed. The content
+page report reads these stored counters, so that it can filter and sort pages by
+view count without counting their page views. Unlike the page view report, it
+doesn't include the page views that haven't been rolled up yet.
+"""
+
+import datetime
+from typing import Any
+
+from django.db import transaction  # type: ignore
+from django.db.models import (  # type: ignore
+    Count,
+    DateField,
+    F,
+    Func,
+    Max,
+    Model,
+    QuerySet,
+    Sum,
+)
+from django.db.models.functions import (  # type: ignore
+    Coalesce,
+    TruncDate,
+    TruncMonth,
+)
+from django.utils import timezone  # type: ignore
+
+from .models import (
+    PageView,
+    PageViewCounter,
+    PageViewDailyRollup,
+    PageViewMonthlyRollup,
+    PageViewRollupState,
+)
+
+ROLLUP_DELAY = datetime.timedelta(minutes=5)
+
+
+def get_last_rolled_up_id() -> int:
+    """
+    The id of the last page view in the rollups
+    """
+    state = PageViewRollupState.objects.values_list("last_page_view_id", flat=True)
+    return state.first() or 0
+
+
+def roll_up_page_views(batch_size: int = 10000) -> int:
+    """
+    Adds the page views recorded since the last run to the rollups, `batch_size`
+    at a time, and returns how many were added.
+    """
+    cutoff = timezone.now() - ROLLUP_DELAY
+    total = 0
+    while True:
+        with transaction.atomic():
+            # Locking the state means that only one run adds page views at a time
+            state, _ = PageViewRollupState.objects.select_for_update().get_or_create(
+                pk=1
+            )
+            ids = list(
+                PageView.objects.filter(
+                    id__gt=state.last_page_view_id, timestamp__lt=cutoff
+                )
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                return total
+            page_views = PageView.objects.filter(
+                id__gt=state.last_page_view_id, id__lte=ids[-1]
+            )
+            add_to_rollup(PageViewDailyRollup, page_views, TruncDate("timestamp"))
+            add_to_rollup(
+                PageViewMonthlyRollup,
+                page_views,
+                TruncMonth("timestamp", output_field=DateField()),
+            )
+            add_to_counters(page_views)
+            state.last_page_view_id = ids[-1]
+            state.save(update_fields=["last_page_view_id"])
+            total += len(ids)
+
+
+def add_to_rollup(model: type[Model], page_views: QuerySet, date: Func) -> None:
+    """
+    Adds the counts of `page_views` grouped by `date`, page, platform and message
+    to the rollup `model`
+    """
+    counts = {
+        (row["date"], row["page_id"], row["platform"], row["message"]): row["count"]
+        for row in page_views.annotate(date=date)
+        .values("date", "page_id", "platform", "message")
+        .annotate(count=Count("id"))
+        .order_by()
+    }
+    existing = model.objects.filter(
+        date__in={key[0] for key in counts},
+        page_id__in={key[1] for key in counts},
+    )
+    updated = []
+    for rollup in existing:
+        key = (rollup.date, rollup.page_id, rollup.platform, rollup.message)
+        if key in counts:
+            rollup.count += counts.pop(key)
+            updated.append(rollup)
+    model.objects.bulk_update(updated, ["count"])
+    model.objects.bulk_create(
+        model(date=date, page_id=page_id, platform=platform, message=message, count=n)
+        for (date, page_id, platform, message), n in counts.items()
+    )
+
+
+def add_to_counters(page_views: QuerySet) -> None:
+    """
+    Adds `page_views` to the PageViewCounter of their pages
+    """
+    counts: dict[int, dict[str, Any]] = {}
+    for row in (
+        page_views.values("page_id", "platform")
+        .annotate(count=Count("id"), last_viewed_at=Max("timestamp"))
+        .order_by()
+    ):
+        total = counts.setdefault(
+            row["page_id"], {"count": 0, "last_viewed_at": None, "platforms": {}}
+        )
+        total["count"] += row["count"]
+        total["platforms"][row["platform"]] = row["count"]
+        if (
+            total["last_viewed_at"] is None
+            or row["last_viewed_at"] > total["last_viewed_at"]
+        ):
+            total["last_viewed_at"] = row["last_viewed_at"]
+
+    existing = PageViewCounter.objects.filter(page_id__in=counts)
+    updated = []
+    for counter in existing:
+        new = counts.pop(counter.page_id)
+        counter.count += new["count"]
+        for platform, count in new["platforms"].items():
+            counter.platforms[platform] = counter.platforms.get(platform, 0) + count
+        if counter.last_viewed_at is None or (
+            new["last_viewed_at"] > counter.last_viewed_at
+        ):
+            counter.last_viewed_at = new["last_viewed_at"]
+        updated.append(counter)
+    PageViewCounter.objects.bulk_update(
+        updated, ["count", "last_viewed_at", "platforms"]
+    )
+    PageViewCounter.objects.bulk_create(
+        PageViewCounter(page_id=page_id, **counter)
+        for page_id, counter in counts.items()
+    )
+
+
+def get_views_per_month(
+    platform: str | None = None,
+    page: Any = None,
+    start: datetime.datetime | None = None,
+    end: datetime.datetime | None = None,
+) -> list[tuple[datetime.date, int]]:
+    """
+    Returns the number of page views in each month, as a list of (month, count),
+    for the page views matching the filters of the page view report. When there
+    is a `start` or `end` time, the daily rollups are used, so the rolled up page
+    views are filtered to the day: from the day of `start`, up to the day of
+    `end`, which is only included if `end` isn't midnight.
+    """
+    filters: dict[str, Any] = {}
+    if platform:
+        filters["platform"] = platform
+    if page:
+        filters["page"] = page
+
+    if start or end:
+        rollups = PageViewDailyRollup.objects.filter(**filters)
+        if start:
+            rollups = rollups.filter(date__gte=timezone.localdate(start))
+        if end:
+            end_date = timezone.localdate(end)
+            if timezone.localtime(end).time() == datetime.time():
+                rollups = rollups.filter(date__lt=end_date)
+            else:
+                rollups = rollups.filter(date__lte=end_date)
+        rollups = rollups.annotate(month=TruncMonth("date"))
+    else:
+        rollups = PageViewMonthlyRollup.objects.filter(**filters).annotate(
+            month=F("date")
+        )
+
+    views = {
+        row["month"]: row["total"]
+        for row in rollups.values("month").annotate(total=Sum("count")).order_by()
+    }
+
+    recent = PageView.objects.filter(id__gt=get_last_rolled_up_id(), **filters)
+    if start:
+        recent = recent.filter(timestamp__gte=start)
+    if end:
+        recent = recent.filter(timestamp__lte=end)
+    for row in (
+        recent.annotate(month=TruncMonth("timestamp", output_field=DateField()))
+        .values("month")
+        .annotate(total=Count("id"))
+        .order_by()
+    ):
+        views[row["month"]] = views.get(row["month"], 0) + row["total"]
+
+    return sorted(views.items())
+
+
+def annotate_view_counts(queryset: QuerySet) -> QuerySet:
+    """
+    Annotates the content pages in `queryset` with their stored number of page
+    views as `view_counter`, and when they were last viewed as `last_viewed_at`
+    """
+    return queryset.annotate(
+        view_counter=Coalesce(F("view_count__count"), 0),
+        last_viewed_at=F("view_count__last_viewed_at"),
+    )
@@ -0,0 +1,222 @@
+"""
+Buffered recording of page views.
+
+Recording a page view used to be an INSERT on every pages API detail request.
+Instead, page views are queued in memory and written in batches with
+bulk_create by a background thread, every PAGE_VIEW_FLUSH_INTERVAL seconds or
+as soon as PAGE_VIEW_FLUSH_SIZE page views are waiting. If the queue reaches
+PAGE_VIEW_BUFFER_SIZE, the request thread writes it out itself rather than
+dropping page views. The queue is also written out when the process exits
+cleanly.
+
+Because the timestamp of a page view is set when it is written, it can be up to
+PAGE_VIEW_FLUSH_INTERVAL seconds after the request.
+
+If a batch can't be written, eg. because the database is unavailable, it is kept
+and written with the next flush. If it can't be written because of its rows,
+eg. because a viewed page has since been deleted, the page views are written one
+at a time, and only the ones that can't be written are dropped.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+from typing import Any
+
+from django.apps import apps  # type: ignore
+from django.conf import settings  # type: ignore
+from django.db import (  # type: ignore
+    DatabaseError,
+    IntegrityError,
+    close_old_connections,
+    connection,
+    transaction,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PageViewRecorder:
+    def __init__(self, flush_size: int, flush_interval: float, buffer_size: int):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.pid: int | None = None
+        self._setup()
+        atexit.register(self.stop)
+
+    def _setup(self) -> None:
+        self.queue: queue.Queue[Any] = queue.Queue(maxsize=self.buffer_size)
+        # Page views from a batch that couldn't be written, to retry
+        self.pending: list[Any] = []
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """
+        Starts the background thread, if it isn't already running in this process.
+        """
+        if self.pid != os.getpid():
+            # We've been forked, and the thread, locks and queue we inherited belong
+            # to the parent process.
+            self._setup()
+            self.pid = os.getpid()
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self.run, name="page-view-recorder", daemon=True
+            )
+            self.thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the background thread and writes out any queued page views.
+        """
+        if self.pid is not None and self.pid != os.getpid():
+            # The queue was inherited from the parent process, which writes it out
+            return
+        self.stopping.set()
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def run(self) -> None:
+        try:
+            while not self.stopping.is_set():
+                self.wakeup.wait(self.flush_interval)
+                self.wakeup.clear()
+                # Don't reuse a connection that was broken by the last flush
+                close_old_connections()
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception("Failed to write buffered page views")
+                finally:
+                    close_old_connections()
+        finally:
+            connection.close()
+
+    def record(self, page_view: Any) -> None:
+        """
+        Queues an unsaved PageView to be written.
+        """
+        self.start()
+        while True:
+            try:
+                self.queue.put_nowait(page_view)
+                break
+            except queue.Full:
+                # Apply back-pressure to the request rather than losing page views
+                self.flush()
+        if self.queue.qsize() >= self.flush_size:
+            self.wakeup.set()
+
+    def flush(self) -> int:
+        """
+        Writes all queued page views, returning how many were written. If they
+        can't be written, they are kept to be written by the next flush, and the
+        error is raised.
+        """
+        with self.flush_lock:
+            page_views, self.pending = self.pending, []
+            while True:
+                try:
+                    page_views.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not page_views:
+                return 0
+            return self.write(page_views)
+
+    def write(self, page_views: list[Any]) -> int:
+        PageView = apps.get_model("home", "PageView")
+        try:
+            with transaction.atomic():
+                PageView.objects.bulk_create(page_views, batch_size=self.flush_size)
+            return len(page_views)
+        except IntegrityError:
+            pass
+        except DatabaseError:
+            self.retry(page_views)
+            raise
+
+        # Some of the page views can't be written, find them
+        written = 0
+        for i, page_view in enumerate(page_views):
+            reset(page_view)
+            try:
+                with transaction.atomic():
+                    page_view.save()
+            except IntegrityError:
+                logger.warning(
+                    "Dropped a page view of page %s, revision %s that can't be written",
+                    page_view.page_id,
+                    page_view.revision_id,
+                    exc_info=True,
+                )
+            except DatabaseError:
+                self.retry(page_views[i:])
+                raise
+            else:
+                written += 1
+        return written
+
+    def retry(self, page_views: list[Any]) -> None:
+        """
+        Keeps page views that couldn't be written for the next flush
+        """
+        for page_view in page_views:
+            reset(page_view)
+        self.pending = page_views
+
+
+def reset(page_view: Any) -> None:
+    """
+    Makes a page view that failed to be written unsaved again
+    """
+    page_view.pk = None
+    page_view._state.adding = True
+
+
+_recorder: PageViewRecorder | None = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder() -> PageViewRecorder:
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = PageViewRecorder(
+                flush_size=settings.PAGE_VIEW_FLUSH_SIZE,
+                flush_interval=settings.PAGE_VIEW_FLUSH_INTERVAL,
+                buffer_size=settings.PAGE_VIEW_BUFFER_SIZE,
+            )
+        return _recorder
+
+
+def record_page_view(page_view: Any) -> None:
+    """
+    Saves an unsaved PageView, in the background if PAGE_VIEW_BUFFERING is on.
+    """
+    if settings.PAGE_VIEW_BUFFERING:
+        get_recorder().record(page_view)
+    else:
+        page_view.save()
+
+
+def record_page_views(page_views: list[Any]) -> None:
+    """
+    Saves several unsaved PageViews, in the background if PAGE_VIEW_BUFFERING is
+    on, or otherwise with a single bulk insert.
+    """
+    if settings.PAGE_VIEW_BUFFERING:
+        recorder = get_recorder()
+        for page_view in page_views:
+            recorder.record(page_view)
+    elif page_views:
+        PageView = apps.get_model("home", "PageView")
+        PageView.objects.bulk_create(page_views)
@@ -0,0 +1,162 @@
+"""
+Monthly range partitioning of the page view and page rating tables on Postgres.
+
+The home_pageview and home_contentpagerating tables only grow, so they are
+partitioned by month on their timestamp, by migration 0097. Their existing rows
+became a single `<table>_legacy` partition, up to the start of the next month,
+and a `<table>_default` partition catches rows that don't fit any other
+partition, so that writes never fail if partitions haven't been created.
+
+The manage_partitions management command creates the partitions for the coming
+months, moving any rows for those months out of the default partition, and
+detaches and drops the partitions that are older than the retention period,
+first writing them to gzipped CSV files if asked to. Page views that are dropped
+are still counted in the rollups and page view counters, so partitions with page
+views that haven't been rolled up yet aren't dropped.
+
+Postgres requires the partition key to be part of the primary key, so the
+primary key of the partitioned tables is (id, timestamp). The ids are still
+unique, as they come from a single sequence.
+"""
+
+import datetime
+import gzip
+import re
+from pathlib import Path
+
+from django.db import transaction  # type: ignore
+from django.db.backends.base.base import BaseDatabaseWrapper  # type: ignore
+
+PARTITIONED_MODELS = ["home.PageView", "home.ContentPageRating"]
+
+PARTITION_BOUND = re.compile(r"TO \('(\d{4}-\d{2}-\d{2})")
+
+
+class PartitionError(Exception):
+    pass
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    """
+    Returns the first day of the month `months` after the month of `month`
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def is_partitioned(connection: BaseDatabaseWrapper, table: str) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid))",
+            [table],
+        )
+        return cursor.fetchone()[0]
+
+
+def get_partitions(
+    connection: BaseDatabaseWrapper, table: str
+) -> list[tuple[str, datetime.date]]:
+    """
+    Returns the partitions of `table` that have an upper bound, as a list of
+    (name, upper bound), oldest first
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+            [table],
+        )
+        partitions = []
+        for name, bound in cursor.fetchall():
+            match = PARTITION_BOUND.search(bound)
+            if match:
+                upper = datetime.date.fromisoformat(match.group(1))
+                partitions.append((name, upper))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partitions(
+    connection: BaseDatabaseWrapper,
+    table: str,
+    months_ahead: int,
+    today: datetime.date | None = None,
+) -> list[str]:
+    """
+    Creates the partitions of `table` up to `months_ahead` months after the
+    current month, returning the names of the new partitions. Rows for those
+    months in the default partition are moved into the new partitions.
+    """
+    today = today or datetime.datetime.now(datetime.timezone.utc).date()
+    qn = connection.ops.quote_name
+    default = f"{table}_default"
+    partitions = get_partitions(connection, table)
+    month = partitions[-1][1] if partitions else add_months(today, 0)
+    last_month = add_months(today, months_ahead)
+    created = []
+    while month <= last_month:
+        name = f"{table}_p{month:%Y%m}"
+        bounds = [month.isoformat(), add_months(month, 1).isoformat()]
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            # Postgres can't add a partition while the default partition has rows
+            # that belong in it, so they're moved into the new partition before
+            # it's attached. Writes to the default partition wait until then.
+            cursor.execute(f"LOCK TABLE {qn(default)} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(f"CREATE TABLE {qn(name)} (LIKE {qn(table)})")
+            move_rows = (
+                f"WITH moved AS (DELETE FROM {qn(default)} "  # noqa: S608
+                f"WHERE timestamp >= %s AND timestamp < %s RETURNING *) "
+                f"INSERT INTO {qn(name)} SELECT * FROM moved"
+            )
+            cursor.execute(move_rows, bounds)
+            cursor.execute(
+                f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                bounds,
+            )
+        created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def drop_partitions(
+    connection: BaseDatabaseWrapper,
+    table: str,
+    keep_months: int,
+    archive_dir: str | Path | None = None,
+    today: datetime.date | None = None,
+    max_id: int | None = None,
+) -> list[str]:
+    """
+    Detaches and drops the partitions of `table` that only hold rows from before
+    the last `keep_months` months, writing each one to a gzipped CSV file in
+    `archive_dir` first if it is given. Returns the names of the dropped
+    partitions.
+
+    If `max_id` is given and any of those partitions has rows with ids above it,
+    none of them are dropped, and a PartitionError is raised.
+    """
+    today = today or datetime.datetime.now(datetime.timezone.utc).date()
+    qn = connection.ops.quote_name
+    cutoff = add_months(today, -keep_months)
+    old = [name for name, upper in get_partitions(connection, table) if upper <= cutoff]
+    if max_id is not None:
+        with connection.cursor() as cursor:
+            for name in old:
+                newer = f"SELECT EXISTS (SELECT 1 FROM {qn(name)} WHERE id > %s)"  # noqa: S608
+                cursor.execute(newer, [max_id])
+                if cursor.fetchone()[0]:
+                    raise PartitionError(f"{name} has rows with ids above {max_id}")
+
+    for name in old:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            if archive_dir is not None:
+                path = Path(archive_dir) / f"{name}.csv.gz"
+                with gzip.open(path, "wb") as f:
+                    cursor.copy_expert(f"COPY {qn(name)} TO STDOUT WITH CSV HEADER", f)
+            cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}")
+            cursor.execute(f"DROP TABLE {qn(name)}")
+    return old
@@ -8,7 +8,9 @@ from wagtail.api.v2.serializers import (
     PageSerializer,
 )
 from wagtail.api.v2.utils import get_object_detail_url
+from wagtail.models import Page
 
+from home.message_manifest import CHANNELS, get_message_manifest
 from home.models import ContentPage, ContentPageRating, PageView
 
 
@@ -77,19 +79,9 @@ def has_children_field_representation(page):
 
 
 def has_next_message(message_index, content_page, platform):
-    messages_length = None
-    if platform == "whatsapp":
-        messages_length = len(content_page.whatsapp_body._raw_data) - 1
-    elif platform == "sms":
-        messages_length = len(content_page.sms_body._raw_data) - 1
-    elif platform == "ussd":
-        messages_length = len(content_page.ussd_body._raw_data) - 1
-    elif platform == "viber":
-        messages_length = len(content_page.viber_body._raw_data) - 1
-    elif platform == "messenger":
-        messages_length = len(content_page.messenger_body._raw_data) - 1
-    else:
+    if platform not in CHANNELS:
         return None
+    messages_length = len(get_message_manifest(content_page)[platform]) - 1
     if messages_length == message_index:
         return None
     elif messages_length > message_index:
@@ -97,66 +89,16 @@ def has_next_message(message_index, content_page, platform):
 
 
 def has_previous_message(message_index, content_page, platform):
-    messages_length = None
-    if platform == "whatsapp":
-        messages_length = len(content_page.whatsapp_body._raw_data) - 1
-    elif platform == "sms":
-        messages_length = len(content_page.sms_body._raw_data) - 1
-    elif platform == "ussd":
-        messages_length = len(content_page.ussd_body._raw_data) - 1
-    elif platform == "viber":
-        messages_length = len(content_page.viber_body._raw_data) - 1
-    elif platform == "messenger":
-        messages_length = len(content_page.messenger_body._raw_data) - 1
-    else:
+    if platform not in CHANNELS:
         return None
+    messages_length = len(get_message_manifest(content_page)[platform]) - 1
     if messages_length != 0 and message_index > 0:
         return message_index
 
 
 def format_whatsapp_message(message_index, content_page, platform):
-    # Flattens the variation_messages field in the whatsapp message
-    text = content_page.whatsapp_body._raw_data[message_index]
-    variation_messages = text["value"].get("variation_messages", [])
-    new_var_messages = []
-    for var in variation_messages:
-        new_var_messages.append(
-            {
-                "profile_field": var["value"]["variation_restrictions"][0]["type"],
-                "value": var["value"]["variation_restrictions"][0]["value"],
-                "message": var["value"]["message"],
-            }
-        )
-    text["value"]["variation_messages"] = new_var_messages
-
-    # For backwards compatibility we are exposing the new format under list_items_v2, and maintaining list_items the way it was.
-    # For example:
-    # New Format:
-    # {
-    #     "id": "179bf4be-2bea-49db-8558-51f7da8b888f",
-    #     "type": "next_message",
-    #     "value": {
-    #         "title": "English"
-    #     }
-    # }
-    #
-    # Old Format:
-    # {
-    #     "id": "8db577c1-67ab-49e1-825a-960b891374f4",
-    #     "type": "item",
-    #     "value": "English"
-    # }
-    if text["value"]["list_items"]:
-        text["value"]["list_items_v2"] = text["value"]["list_items"]
-
-        current_list_items = text["value"]["list_items"]
-        list_items = [
-            {"id": item["id"], "type": "item", "value": item["value"]["title"]}
-            for item in current_list_items
-        ]
-        text["value"]["list_items"] = list_items
-
-    return text
+    # The flattened message is precomputed in the page's message manifest
+    return get_message_manifest(content_page)["whatsapp"][message_index]
 
 
 class BodyField(serializers.Field):
@@ -171,6 +113,25 @@ class BodyField(serializers.Field):
         "total_messages": 3,
         "text": "body based on platform requested"
     }
+
+    With messages=all, every message for the platform is returned:
+    "body": {
+        "total_messages": 2,
+        "messages": [
+            {
+                "message": 1,
+                "next_message": 2,
+                "previous_message": None,
+                "text": "first message"
+            },
+            {
+                "message": 2,
+                "next_message": None,
+                "previous_message": 1,
+                "text": "second message"
+            }
+        ]
+    }
     """
 
     def get_attribute(self, instance):
@@ -182,7 +143,13 @@ class BodyField(serializers.Field):
 
 
 def body_field_representation(page, request):
-    if "message" in request.GET:
+    all_messages = "messages" in request.GET
+    if all_messages and request.GET["messages"] != "all":
+        raise ValidationError(
+            'The only supported value for messages in the query string is "all"'
+        )
+
+    if "message" in request.GET and not all_messages:
         try:
             message = int(request.GET["message"]) - 1
         except ValueError:
@@ -192,127 +159,66 @@ def body_field_representation(page, request):
     else:
         message = 0
 
-    if "whatsapp" in request.GET and (
-        page.enable_whatsapp is True
-        or ("qa" in request.GET and request.GET["qa"] == "True")
-    ):
-        if page.whatsapp_body != []:
-            try:
-                return OrderedDict(
-                    [
-                        ("message", message + 1),
-                        (
-                            "next_message",
-                            has_next_message(message, page, "whatsapp"),
-                        ),
-                        (
-                            "previous_message",
-                            has_previous_message(message, page, "whatsapp"),
-                        ),
-                        ("total_messages", len(page.whatsapp_body._raw_data)),
-                        (
-                            "text",
-                            format_whatsapp_message(message, page, "whatsapp"),
-                        ),
-                        ("revision", page.get_latest_revision().id),
-                        ("is_whatsapp_template", page.is_whatsapp_template),
-                        ("whatsapp_template_name", page.whatsapp_template_name),
-                        (
-                            "whatsapp_template_category",
-                            page.whatsapp_template_category,
-                        ),
-                    ]
-                )
-            except IndexError:
-                raise ValidationError("The requested message does not exist")
-    elif "sms" in request.GET and (
-        page.enable_sms is True or ("qa" in request.GET and request.GET["qa"] == "True")
-    ):
-        if page.sms_body != []:
-            try:
-                return OrderedDict(
-                    [
-                        ("message", message + 1),
-                        (
-                            "next_message",
-                            has_next_message(message, page, "sms"),
-                        ),
-                        (
-                            "previous_message",
-                            has_previous_message(message, page, "sms"),
-                        ),
-                        ("total_messages", len(page.sms_body._raw_data)),
-                        ("text", page.sms_body._raw_data[message]["value"]),
-                    ]
-                )
-            except IndexError:
-                raise ValidationError("The requested message does not exist")
-    elif "ussd" in request.GET and (
-        page.enable_ussd is True
-        or ("qa" in request.GET and request.GET["qa"] == "True")
-    ):
-        if page.ussd_body != []:
-            try:
-                return OrderedDict(
-                    [
-                        ("message", message + 1),
-                        (
-                            "next_message",
-                            has_next_message(message, page, "ussd"),
-                        ),
-                        (
-                            "previous_message",
-                            has_previous_message(message, page, "ussd"),
-                        ),
-                        ("total_messages", len(page.ussd_body._raw_data)),
-                        ("text", page.ussd_body._raw_data[message]["value"]),
-                    ]
-                )
-            except IndexError:
-                raise ValidationError("The requested message does not exist")
-    elif "messenger" in request.GET and (
-        page.enable_messenger is True
-        or ("qa" in request.GET and request.GET["qa"] == "True")
-    ):
-        if page.messenger_body != []:
-            try:
-                return OrderedDict(
-                    [
-                        ("message", message + 1),
-                        (
-                            "next_message",
-                            has_next_message(message, page, "messenger"),
-                        ),
-                        (
-                            "previous_message",
-                            has_previous_message(message, page, "messenger"),
-                        ),
-                        ("total_messages", len(page.messenger_body._raw_data)),
-                        ("text", page.messenger_body._raw_data[message]["value"]),
-                    ]
-                )
-            except IndexError:
-                raise ValidationError("The requested message does not exist")
-    elif "viber" in request.GET and (
-        page.enable_viber is True
-        or ("qa" in request.GET and request.GET["qa"] == "True")
-    ):
-        if page.viber_body != []:
+    qa = "qa" in request.GET and request.GET["qa"] == "True"
+    for channel in CHANNELS:
+        if channel in request.GET and (
+            getattr(page, f"enable_{channel}") is True or qa
+        ):
+            break
+    else:
+        channel = None
+
+    if channel:
+        messages = get_message_manifest(page)[channel]
+        if all_messages:
+            body = OrderedDict(
+                [
+                    ("total_messages", len(messages)),
+                    (
+                        "messages",
+                        [
+                            OrderedDict(
+                                [
+                                    ("message", index + 1),
+                                    (
+                                        "next_message",
+                                        has_next_message(index, page, channel),
+                                    ),
+                                    (
+                                        "previous_message",
+                                        has_previous_message(index, page, channel),
+                                    ),
+                                    ("text", text),
+                                ]
+                            )
+                            for index, text in enumerate(messages)
+                        ],
+                    ),
+                ]
+            )
+        else:
             try:
-                return OrderedDict(
-                    [
-                        ("message", message + 1),
-                        ("next_message", has_next_message(message, page, "viber")),
-                        (
-                            "previous_message",
-                            has_previous_message(message, page, "viber"),
-                        ),
-                        ("total_messages", len(page.viber_body._raw_data)),
-                        ("text", page.viber_body._raw_data[message]["value"]),
-                    ]
-                )
+                text = messages[message]
             except IndexError:
                 raise ValidationError("The requested message does not exist")
+            body = OrderedDict(
+                [
+                    ("message", message + 1),
+                    ("next_message", has_next_message(message, page, channel)),
+                    (
+                        "previous_message",
+                        has_previous_message(message, page, channel),
+                    ),
+                    ("total_messages", len(messages)),
+                    ("text", text),
+                ]
+            )
+        if channel == "whatsapp":
+            body["revision"] = page.latest_revision_id
+            body["is_whatsapp_template"] = page.is_whatsapp_template
+            body["whatsapp_template_name"] = page.whatsapp_template_name
+            body["whatsapp_template_category"] = page.whatsapp_template_category
+        return body
     return OrderedDict(
         [
             ("text", page.body._raw_data),
@@ -329,15 +235,55 @@ class RelatedPagesField(serializers.Field):
         return related_pages_field_representation(page, request)
 
 
-def get_related_page_as_content_page(page):
-    if page.id:
-        return ContentPage.objects.filter(id=page.id).first()
+# Only the columns needed to render a related page link, so that resolving
+# related pages doesn't load every StreamField body of every linked page.
+RELATED_PAGE_FIELDS = [
+    "id",
+    "title",
+    "enable_whatsapp",
+    "whatsapp_title",
+    "enable_sms",
+    "sms_title",
+    "enable_ussd",
+    "ussd_title",
+    "enable_messenger",
+    "messenger_title",
+    "enable_viber",
+    "viber_title",
+]
+
+
+def get_related_page_ids(page):
+    """
+    Returns the ids of the pages linked in `page.related_pages`, read from the
+    raw StreamField data so that the linked pages aren't fetched one by one.
+    """
+    return [
+        block["value"] for block in page.related_pages.raw_data if block.get("value")
+    ]
 
 
-def related_pages_field_representation(page, request):
+def get_related_pages_in_bulk(pages):
+    """
+    Fetches the related pages of all of `pages` in a single query, returning a
+    dict of ContentPages keyed by id.
+    """
+    ids = {pk for page in pages for pk in get_related_page_ids(page)}
+    if not ids:
+        return {}
+    return ContentPage.objects.only(*RELATED_PAGE_FIELDS).in_bulk(ids)
+
+
+def related_pages_field_representation(page, request, related_pages_by_id=None):
+    if related_pages_by_id is None:
+        related_pages_by_id = get_related_pages_in_bulk([page])
+
     related_pages = []
-    for related in page.related_pages:
-        related_page = get_related_page_as_content_page(related.value)
+    for related in page.related_pages.raw_data:
+        related_page = related_pages_by_id.get(related.get("value"))
+        if related_page is None:
+            # The linked page has been deleted, or isn't a ContentPage
+            continue
         title = related_page.title
         if "whatsapp" in request.GET and related_page.enable_whatsapp is True:
             if related_page.whatsapp_title:
@@ -357,7 +303,7 @@ def related_pages_field_representation(page, request):
 
         related_pages.append(
             {
-                "id": related.id,
+                "id": related.get("id"),
                 "value": related_page.id,
                 "title": title,
             }
@@ -375,49 +321,163 @@ class ContentPageSerializer(PageSerializer):
     def to_representation(self, page):
         request = self.context["request"]
         router = self.context["router"]
+        fields = self.get_requested_fields()
+        self.prefetch_pages(page, fields)
+        representation = {
+            "id": lambda: page.id,
+            "meta": lambda: metadata_field_representation(
+                page, request, router, fields
+            ),
+            "title": lambda: title_field_representation(page, request),
+            "subtitle": lambda: subtitle_field_representation(page),
+            "body": lambda: body_field_representation(page, request),
+            "tags": lambda: [x.name for x in page.tags.all()],
+            "triggers": lambda: [x.name for x in page.triggers.all()],
+            "quick_replies": lambda: [x.name for x in page.quick_replies.all()],
+            "has_children": lambda: has_children_field_representation(page),
+            "related_pages": lambda: related_pages_field_representation(
+                page, request, self.context["related_pages_by_id"]
+            ),
+        }
+        if fields is not None:
+            # The meta fields are nested under "meta", and the id is always included
+            fields = fields | {"id"}
+            if fields & set(self.meta_fields):
+                fields.add("meta")
         return {
-            "id": page.id,
-            "meta": metadata_field_representation(page, request, router),
-            "title": title_field_representation(page, request),
-            "subtitle": subtitle_field_representation(page),
-            "body": body_field_representation(page, request),
-            "tags": [x.name for x in page.tags.all()],
-            "triggers": [x.name for x in page.triggers.all()],
-            "quick_replies": [x.name for x in page.quick_replies.all()],
-            "has_children": has_children_field_representation(page),
-            "related_pages": related_pages_field_representation(page, request),
+            name: value()
+            for name, value in representation.items()
+            if fields is None or name in fields
         }
 
+    def get_requested_fields(self):
+        """
+        The fields selected with the `fields` query parameter, or None if it
+        wasn't given, in which case every field is included. Wagtail builds a
+        subclass of this serializer with the selected fields in `Meta.fields`.
+        """
+        meta = getattr(self, "Meta", None)
+        if "fields" not in self.context["request"].GET or meta is None:
+            return None
+        return set(meta.fields)
+
+    @staticmethod
+    def prefetch_queryset(queryset):
+        """
+        Prefetches the relations that are read for every page in
+        `to_representation`, so that a listing costs a constant number of queries.
+        """
+        return queryset.select_related("locale").prefetch_related(
+            "tags", "triggers", "quick_replies"
+        )
 
-def metadata_field_representation(page, request, router):
-    parent = {}
-    page_parent = page.get_parent()
-    detail_url = get_object_detail_url(router, request, type(page), page.pk)
-    if page_parent:
-        parent = {
+    def prefetch_pages(self, page, fields=None):
+        """
+        Loads the parents and related pages of every page being serialized
+        together with `page` in bulk, the first time any of them is serialized.
+        The related pages are shared through the serializer context. Pages that
+        aren't in the requested `fields` aren't loaded.
+        """
+        prefetched = self.context.setdefault("prefetched_pages", set())
+        self.context.setdefault("related_pages_by_id", {})
+        if page.pk in prefetched:
+            return
+        if isinstance(self.parent, serializers.ListSerializer):
+            pages = list(self.parent.instance)
+        else:
+            pages = [page]
+        prefetched.update(p.pk for p in pages)
+        if fields is None or "parent" in fields:
+            prefetch_parents(pages)
+        if fields is None or "related_pages" in fields:
+            self.context["related_pages_by_id"].update(get_related_pages_in_bulk(pages))
+
+
+def prefetch_parents(pages):
+    """
+    Fetches the parents of all of `pages` in a single query, and caches each one
+    where treebeard's `get_parent` looks for it.
+    """
+    parent_paths = {
+        page.path[: -page.steplen]
+        for page in pages
+        if page.depth > 1 and not hasattr(page, "_cached_parent_obj")
+    }
+    if not parent_paths:
+        return
+    parents = {p.path: p for p in Page.objects.filter(path__in=parent_paths)}
+    for page in pages:
+        parent = parents.get(page.path[: -page.steplen])
+        if parent is not None:
+            page._cached_parent_obj = parent
+
+
+def get_request_cache(request, name):
+    """
+    Returns a dict stored on `request`, for memoising lookups that are repeated
+    for many pages within a single request.
+    """
+    try:
+        caches = request._contentrepo_caches
+    except AttributeError:
+        caches = request._contentrepo_caches = {}
+    return caches.setdefault(name, {})
+
+
+def content_type_label(page, request):
+    labels = get_request_cache(request, "content_type_labels")
+    if page.content_type_id not in labels:
+        content_type = page.cached_content_type
+        labels[page.content_type_id] = (
+            content_type.app_label + "." + content_type.model_class()._meta.object_name
+        )
+    return labels[page.content_type_id]
+
+
+def parent_metadata_representation(page_parent, request):
+    parents = get_request_cache(request, "parents")
+    if page_parent.id not in parents:
+        parents[page_parent.id] = {
             "id": page_parent.id,
             "meta": {
-                "type": page_parent.cached_content_type.app_label
-                + "."
-                + page_parent.cached_content_type.model_class()._meta.object_name,
-                "html_url": page_parent.get_full_url(),
+                "type": content_type_label(page_parent, request),
+                "html_url": page_parent.get_full_url(request),
             },
             "title": page_parent.title,
         }
+    return parents[page_parent.id]
+
+
+def parent_field_representation(page, request):
+    page_parent = page.get_parent()
+    if not page_parent:
+        return {}
+    return parent_metadata_representation(page_parent, request)
+
+
+def metadata_field_representation(page, request, router, fields=None):
+    """
+    The meta fields of a page, or only those in `fields` if it is given
+    """
+    meta = {
+        "type": lambda: content_type_label(page, request),
+        "detail_url": lambda: get_object_detail_url(
+            router, request, type(page), page.pk
+        ),
+        "html_url": lambda: page.get_full_url(request),
+        "slug": lambda: page.slug,
+        "show_in_menus": lambda: "true" if page.show_in_menus else "false",
+        "seo_title": lambda: page.seo_title,
+        "search_description": lambda: page.search_description,
+        "first_published_at": lambda: page.first_published_at,
+        "alias_of": lambda: page.alias_of,
+        "parent": lambda: parent_field_representation(page, request),
+        "locale": lambda: page.locale.language_code,
+    }
     return {
-        "type": page.cached_content_type.app_label
-        + "."
-        + page.cached_content_type.model_class()._meta.object_name,
-        "detail_url": detail_url,
-        "html_url": page.get_full_url(),
-        "slug": page.slug,
-        "show_in_menus": "true" if page.show_in_menus else "false",
-        "seo_title": page.seo_title,
-        "search_description": page.search_description,
-        "first_published_at": page.first_published_at,
-        "alias_of": page.alias_of,
-        "parent": parent,
-        "locale": page.locale.language_code,
+        name: value()
+        for name, value in meta.items()
+        if fields is None or name in fields
     }
 
 
@@ -447,19 +507,65 @@ class NameField(serializers.Field):
         return instance.name
 
 
+def get_member_page_ids(instance):
+    """
+    Returns the ids of the pages in a `pages` StreamField of PageChooserBlocks
+    """
+    return [block["value"] for block in instance.pages.raw_data if block.get("value")]
+
+
+def get_ordered_member_page_ids(instance):
+    """
+    Returns the ids of the pages in an ordered content set's `pages` StreamField
+    """
+    return [
+        block["value"]["contentpage"]
+        for block in instance.pages.raw_data
+        if block["value"].get("contentpage")
+    ]
+
+
+def prefetch_member_pages(field, instance, get_page_ids):
+    """
+    Loads the pages of every instance being serialized together with `instance`
+    in a single query, the first time any of them is serialized, and returns all
+    the loaded pages keyed by id. The pages are shared through the serializer
+    context, and their tags are prefetched if they'll be shown.
+    """
+    request = field.context["request"]
+    pages_by_id = field.context.setdefault("member_pages_by_id", {})
+    prefetched = field.context.setdefault("prefetched_member_pages", set())
+    if instance.pk in prefetched:
+        return pages_by_id
+
+    if isinstance(field.parent.parent, serializers.ListSerializer):
+        instances = list(field.parent.parent.instance)
+    else:
+        instances = [instance]
+    prefetched.update(i.pk for i in instances)
+
+    ids = {pk for i in instances for pk in get_page_ids(i)} - pages_by_id.keys()
+    if ids:
+        queryset = ContentPage.objects.only(*RELATED_PAGE_FIELDS, "related_pages")
+        if "show_tags" in request.GET and bool(request.GET["show_tags"]):
+            queryset = queryset.prefetch_related("tags")
+        pages_by_id.update(queryset.in_bulk(ids))
+    return pages_by_id
+
+
 class PagesField(serializers.Field):
     def get_attribute(self, instance):
         return instance
 
-    def get_page_as_content_page(self, page):
-        if page.id:
-            return ContentPage.objects.filter(id=page.id).first()
-
     def to_representation(self, instance):
         request = self.context["request"]
+        pages_by_id = prefetch_member_pages(self, instance, get_member_page_ids)
         pages = []
-        for member in instance.pages:
-            page = self.get_page_as_content_page(member.value)
+        for member in instance.pages.raw_data:
+            page = pages_by_id.get(member["value"])
+            if page is None:
+                # The page has been deleted, or isn't a ContentPage
+                continue
             title = page.title
             if "whatsapp" in request.GET and page.enable_whatsapp is True:
                 if page.whatsapp_title:
@@ -481,7 +587,7 @@ class PagesField(serializers.Field):
                 "title": title,
             }
             if "show_related" in request.GET and bool(request.GET["show_related"]):
-                page_data["related_pages"] = [p.value.id for p in page.related_pages]
+                page_data["related_pages"] = get_related_page_ids(page)
             if "show_tags" in request.GET and bool(request.GET["show_tags"]):
                 page_data["tags"] = [x.name for x in page.tags.all()]
 
@@ -493,43 +599,44 @@ class OrderedPagesField(serializers.Field):
     def get_attribute(self, instance):
         return instance
 
-    def get_page_as_content_page(self, page):
-        if page.id:
-            return ContentPage.objects.filter(id=page.id).first()
-
     def to_representation(self, instance):
         request = self.context["request"]
+        pages_by_id = prefetch_member_pages(self, instance, get_ordered_member_page_ids)
         pages = []
-        for member in instance.pages:
-            page = self.get_page_as_content_page(member.value.get("contentpage"))
-            title = page.title if page else ""
-            if "whatsapp" in request.GET and page.enable_whatsapp is True:
-                if page.whatsapp_title:
-                    title = page.whatsapp_title
-            elif "sms" in request.GET and page.enable_sms is True:
-                if page.sms_title:
-                    title = page.sms_title
-            elif "ussd" in request.GET and page.enable_ussd is True:
-                if page.ussd_title:
-                    title = page.ussd_title
-            elif "messenger" in request.GET and page.enable_messenger is True:
-                if page.messenger_title:
-                    title = page.messenger_title
-            elif "viber" in request.GET and page.enable_viber is True:
-                if page.viber_title:
-                    title = page.viber_title
+        for member in instance.pages.raw_data:
+            value = member["value"]
+            # None if the page has been deleted, or isn't a ContentPage
+            page = pages_by_id.get(value.get("contentpage"))
+            title = ""
+            if page is not None:
+                title = page.title
+                if "whatsapp" in request.GET and page.enable_whatsapp is True:
+                    if page.whatsapp_title:
+                        title = page.whatsapp_title
+                elif "sms" in request.GET and page.enable_sms is True:
+                    if page.sms_title:
+                        title = page.sms_title
+                elif "ussd" in request.GET and page.enable_ussd is True:
+                    if page.ussd_title:
+                        title = page.ussd_title
+                elif "messenger" in request.GET and page.enable_messenger is True:
+                    if page.messenger_title:
+                        title = page.messenger_title
+                elif "viber" in request.GET and page.enable_viber is True:
+                    if page.viber_title:
+                        title = page.viber_title
             page_data = {
                 "id": page.id if page else "",
                 "title": title,
-                "time": member.value.get("time"),
-                "unit": member.value.get("unit"),
-                "before_or_after": member.value.get("before_or_after"),
-                "contact_field": member.value.get("contact_field"),
+                "time": value.get("time"),
+                "unit": value.get("unit"),
+                "before_or_after": value.get("before_or_after"),
+                "contact_field": value.get("contact_field"),
             }
             if "show_related" in request.GET and bool(request.GET["show_related"]):
-                page_data["related_pages"] = [p.value.id for p in page.related_pages]
+                page_data["related_pages"] = get_related_page_ids(page) if page else []
             if "show_tags" in request.GET and bool(request.GET["show_tags"]):
-                page_data["tags"] = [x.name for x in page.tags.all()]
+                page_data["tags"] = [x.name for x in page.tags.all()] if page else []
 
             pages.append(page_data)
         return pages
@@ -1,24 +1,35 @@
+import datetime
 import json
 import queue
 from pathlib import Path
+from unittest import mock
 
 import pytest
 from bs4 import BeautifulSoup
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.exceptions import ValidationError  # type: ignore
 from django.core.files.base import File  # type: ignore
 from django.core.files.images import ImageFile  # type: ignore
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from pytest_django.asserts import assertTemplateUsed
 from taggit.models import Tag  # type: ignore
 from wagtail import blocks
 from wagtail.documents.models import Document  # type: ignore
 from wagtail.images.models import Image  # type: ignore
-from wagtail.models import Locale, Workflow, WorkflowContentType
+from wagtail.models import Locale, Page, Workflow, WorkflowContentType
 from wagtail.models.sites import Site  # type: ignore
 from wagtailmedia.models import Media  # type: ignore
 
+from home.api import WhatsAppTemplateViewset
 from home.content_import_export import import_content
+from home.message_manifest import (
+    build_message_manifest,
+    get_revision_message_manifest,
+)
 from home.models import (
     AgeQuestionBlock,
     AnswerBlock,
@@ -31,8 +42,10 @@ from home.models import (
     MultiselectQuestionBlock,
     OrderedContentSet,
     PageView,
+    WhatsAppTemplate,
     YearofBirthQuestionBlock,
 )
+from home.serializers import ContentPageSerializer
 
 from .page_builder import (
     FormBtn,
@@ -284,6 +297,105 @@ class TestContentPageAPI:
         content = json.loads(response.content)
         assert content["count"] == 3
 
+    def test_multiple_tag_filtering(self, uclient):
+        """
+        Multiple comma separated tags match pages with any of the tags, or with
+        all of them if the tag operator is "and".
+        """
+        page1 = self.create_content_page(title="Page 1", tags=["menu", "Health"])
+        page2 = self.create_content_page(title="Page 2", tags=["menu"])
+        self.create_content_page(title="Page 3", tags=["other"])
+
+        response = uclient.get("/api/v2/pages/?tag=menu,health")
+        content = response.json()
+        assert [p["id"] for p in content["results"]] == [page1.id, page2.id]
+
+        response = uclient.get("/api/v2/pages/?tag=Menu, health&tag_operator=and")
+        content = response.json()
+        assert [p["id"] for p in content["results"]] == [page1.id]
+
+        response = uclient.get("/api/v2/pages/?tag=menu,bogus&tag_operator=and")
+        content = response.json()
+        assert content["count"] == 0
+
+    def test_invalid_tag_operator(self, uclient):
+        """
+        Only "and" and "or" are accepted as tag operators.
+        """
+        self.create_content_page(tags=["menu"])
+
+        response = uclient.get("/api/v2/pages/?tag=menu&tag_operator=xor")
+        assert response.status_code == 400
+        assert response.json() == {
+            "tag_operator": ["Tag operator must be one of 'and' or 'or'"]
+        }
+
+    def test_trigger_filtering(self, uclient):
+        """
+        If a trigger filter is provided, only pages with a matching trigger are
+        returned, ignoring case and surrounding whitespace.
+        """
+        page = PageBuilder.build_cp(
+            parent=self.create_content_page(),
+            slug="triggered",
+            title="Triggered",
+            bodies=[],
+            triggers=["Stop"],
+        )
+
+        response = uclient.get("/api/v2/pages/?trigger= stop ")
+        content = response.json()
+        assert [p["id"] for p in content["results"]] == [page.id]
+
+        response = uclient.get("/api/v2/pages/?trigger=bogus")
+        assert response.json()["count"] == 0
+
+    def test_qa_draft_tag_and_trigger_filtering(self, uclient):
+        """
+        In QA mode, pages whose latest draft has the requested tags or trigger
+        are included, even if the published version doesn't have them.
+        """
+        page1 = self.create_content_page(title="Page 1")
+        page2 = self.create_content_page(title="Page 2")
+        page3 = self.create_content_page(title="Page 3", tags=["menu"])
+        page1.tags.add("menu", "health")
+        page1.triggers.add("Stop")
+        page1.save_revision()
+        page2.tags.add("Menu")
+        page2.save_revision()
+
+        def page_ids(query):
+            response = uclient.get(f"/api/v2/pages/?qa=True&{query}")
+            return sorted(p["id"] for p in response.json()["results"])
+
+        assert page_ids("tag=menu") == [page1.id, page2.id, page3.id]
+        assert page_ids("tag=menu,health&tag_operator=and") == [page1.id]
+        assert page_ids("tag=health,bogus") == [page1.id]
+        assert page_ids("tag=health,bogus&tag_operator=and") == []
+        assert page_ids("trigger=stop") == [page1.id]
+        assert page_ids("trigger=bogus") == []
+
+    def test_qa_draft_filtering_number_of_queries(self, uclient):
+        """
+        The drafts matched in QA mode are loaded together, so the number of
+        queries doesn't depend on the number of drafts.
+        """
+        pages = [self.create_content_page(title=f"Page {i}") for i in range(4)]
+        pages[0].tags.add("menu")
+        pages[0].save_revision()
+        uclient.get("/api/v2/pages/?qa=True&tag=menu&trigger=stop")
+
+        with CaptureQueriesContext(connection) as one_draft:
+            uclient.get("/api/v2/pages/?qa=True&tag=menu&trigger=stop")
+        for page in pages[1:]:
+            page.tags.add("menu")
+            page.save_revision()
+        with CaptureQueriesContext(connection) as many_drafts:
+            response = uclient.get("/api/v2/pages/?qa=True&tag=menu&trigger=stop")
+
+        assert response.json()["count"] == 4
+        assert len(many_drafts) == len(one_draft)
+
     def test_platform_filtering(self, uclient):
         """
         If a platform filter is provided, only pages with content for that
@@ -364,6 +476,57 @@ class TestContentPageAPI:
         body = content["body"]["text"]["message"]
         assert body == f"*Default {platform} Content 1* 🏥"
 
+    def test_draft_message_manifest_shared(self, uclient):
+        """
+        The messages of a draft are only formatted once for repeat qa requests,
+        and formatting them doesn't change the draft
+        """
+        page = self.create_content_page(publish=False)
+        [message] = page.whatsapp_body.raw_data
+        message["value"]["list_items"] = [
+            {"type": "next_message", "value": {"title": "Option 1"}, "id": "abc"}
+        ]
+        page.whatsapp_body = [message]
+        page.save_revision()
+
+        url = f"/api/v2/pages/{page.id}/?whatsapp=True&qa=True"
+        with mock.patch(
+            "home.message_manifest.build_message_manifest",
+            wraps=build_message_manifest,
+        ) as build:
+            first = uclient.get(url).json()
+            second = uclient.get(url).json()
+        assert build.call_count == 1
+        assert first["body"] == second["body"]
+        assert first["body"]["text"]["value"]["list_items"] == [
+            {"id": "abc", "type": "item", "value": "Option 1"}
+        ]
+
+        revision = page.get_latest_revision()
+        [message] = json.loads(revision.content["whatsapp_body"])
+        [item] = message["value"]["list_items"]
+        assert item["value"] == {"title": "Option 1"}
+
+    def test_draft_message_manifest_copied(self):
+        """
+        Changing the messages returned for a draft doesn't change them for later
+        requests
+        """
+        page = self.create_content_page(publish=False)
+        revision = page.save_revision()
+
+        manifest = get_revision_message_manifest(page, revision.id, revision.created_at)
+        [message] = manifest["whatsapp"]
+        text = message["value"]["message"]
+        message["value"]["message"] = "Changed"
+        message["type"] = "Changed"
+        manifest["whatsapp"].append(message)
+
+        manifest = get_revision_message_manifest(page, revision.id, revision.created_at)
+        [message] = manifest["whatsapp"]
+        assert message["type"] == "Whatsapp_Message"
+        assert message["value"]["message"] == text
+
     @pytest.mark.parametrize("platform", ALL_PLATFORMS)
     def test_platform_disabled(self, uclient, platform):
         """
@@ -483,9 +646,469 @@ class TestContentPageAPI:
         page = self.create_content_page()
         page = self.create_content_page(page, title="Content Page 1")
         uclient.get("/api/v2/pages/")
-        with django_assert_num_queries(16):
+        with django_assert_num_queries(11):
             uclient.get("/api/v2/pages/")
 
+    def test_listing_number_of_queries(self, uclient, settings):
+        """
+        The tags, triggers, quick replies and parents of the pages in a listing
+        are prefetched, so a full page of results costs the same number of
+        queries as a single result.
+        """
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, "PAGE_SIZE": 5}
+        parent = self.create_content_page(title="Parent")
+        main_menu = parent.get_parent()
+        for i in range(5):
+            PageBuilder.build_cp(
+                parent=parent if i % 2 else main_menu,
+                slug=f"page-{i}",
+                title=f"Page {i}",
+                bodies=[WABody(f"Page {i}", [WABlk(f"Message {i}")])],
+                tags=[f"tag-{i}", "common"],
+                triggers=[f"trigger-{i}"],
+                quick_replies=[f"reply-{i}"],
+            )
+        uclient.get("/api/v2/pages/?tag=common")
+
+        with CaptureQueriesContext(connection) as single:
+            uclient.get("/api/v2/pages/?tag=tag-1")
+        with CaptureQueriesContext(connection) as full_page:
+            response = uclient.get("/api/v2/pages/?tag=common")
+
+        results = {r["title"]: r for r in response.json()["results"]}
+        assert len(results) == 5
+        assert sorted(results["Page 0"]["tags"]) == ["common", "tag-0"]
+        assert results["Page 0"]["triggers"] == ["trigger-0"]
+        assert results["Page 0"]["quick_replies"] == ["reply-0"]
+        assert results["Page 0"]["meta"]["parent"]["id"] == main_menu.id
+        assert results["Page 1"]["meta"]["parent"]["id"] == parent.id
+        assert len(full_page) == len(single)
+
+    def test_listing_has_children(self, uclient):
+        """
+        has_children is read from the tree metadata stored on each page, so it
+        doesn't cost a query per page in a listing.
+        """
+        parent = self.create_content_page(title="Parent")
+        child = self.create_content_page(parent, title="Child")
+        uclient.get("/api/v2/pages/")
+
+        with CaptureQueriesContext(connection) as few_children:
+            response = uclient.get("/api/v2/pages/")
+        results = {r["title"]: r["has_children"] for r in response.json()["results"]}
+        assert results == {"Parent": True, "Child": False}
+
+        self.create_content_page(parent, title="Sibling")
+        self.create_content_page(child, title="Grandchild")
+        with CaptureQueriesContext(connection) as many_children:
+            response = uclient.get("/api/v2/pages/")
+        results = {r["title"]: r["has_children"] for r in response.json()["results"]}
+        assert results == {
+            "Parent": True,
+            "Child": True,
+            "Grandchild": False,
+            "Sibling": False,
+        }
+        assert len(many_children) == len(few_children)
+
+    def test_whatsapp_listing_revision_queries(self, uclient):
+        """
+        The latest revision of each page in a WhatsApp listing is read from the
+        page itself, without querying revisions.
+        """
+        pages = [self.create_content_page(title=f"Page {i}") for i in range(3)]
+        uclient.get("/api/v2/pages/?whatsapp=true")
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = uclient.get("/api/v2/pages/?whatsapp=true")
+
+        revisions = [r["body"]["revision"] for r in response.json()["results"]]
+        assert revisions == [p.get_latest_revision().id for p in pages]
+        assert not any("wagtailcore_revision" in q["sql"] for q in ctx.captured_queries)
+
+    def test_listing_metadata_lookups(self, uclient):
+        """
+        Site root paths are looked up once per request, and the metadata of a
+        parent shared by several pages in a listing is only built once.
+        """
+        parent = self.create_content_page(title="Parent")
+        for i in range(3):
+            self.create_content_page(parent, title=f"Page {i}")
+        uclient.get("/api/v2/pages/")
+
+        get_full_url = Page.get_full_url
+        with (
+            mock.patch.object(
+                Site, "get_site_root_paths", wraps=Site.get_site_root_paths
+            ) as get_site_root_paths,
+            mock.patch.object(
+                Page, "get_full_url", autospec=True, side_effect=get_full_url
+            ) as page_get_full_url,
+        ):
+            response = uclient.get("/api/v2/pages/")
+
+        results = response.json()["results"]
+        assert len(results) == 4
+        assert results[-1]["meta"]["parent"]["meta"] == {
+            "type": "home.ContentPage",
+            "html_url": parent.get_full_url(),
+        }
+        assert get_site_root_paths.call_count == 1
+        # One for each page, and one for each of the two distinct parents
+        assert page_get_full_url.call_count == 6
+
+    def test_cursor_pagination(self, uclient):
+        """
+        With a cursor, the listing is paged through in primary key order by
+        following the next links, without counting the pages.
+        """
+        pages = [self.create_content_page(title=f"Page {i}") for i in range(7)]
+
+        ids = []
+        url = "/api/v2/pages/?cursor="
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                response = uclient.get(url)
+            content = response.json()
+            assert "count" not in content
+            assert not any("COUNT(" in q["sql"] for q in ctx.captured_queries)
+            ids.extend(r["id"] for r in content["results"])
+            url = content["next"]
+
+        assert ids == sorted(p.id for p in pages)
+
+    def test_cursor_pagination_invalid(self, uclient):
+        """
+        A cursor can't be combined with page numbers or ordering, and must be
+        one that the API returned.
+        """
+        self.create_content_page()
+
+        response = uclient.get("/api/v2/pages/?cursor=&page=2")
+        assert response.status_code == 400
+        assert response.json() == {
+            "cursor": ["Cursor pagination can't be combined with page or order"]
+        }
+
+        response = uclient.get("/api/v2/pages/?cursor=notacursor")
+        assert response.status_code == 404
+
+    def test_changed_since(self, uclient, settings):
+        """
+        With changed_since, only the pages published after that time are listed,
+        along with the pages that were unpublished or deleted after it. Polling
+        again with synced_at returns nothing if nothing has changed.
+        """
+        settings.CHANGED_SINCE_SAFETY_WINDOW = 0
+        republished = self.create_content_page(title="Republished")
+        unpublished = self.create_content_page(title="Unpublished")
+        deleted = self.create_content_page(title="Deleted")
+        self.create_content_page(title="Unchanged")
+        changed_since = timezone.now()
+
+        republished.save_revision().publish()
+        created = self.create_content_page(title="Created")
+        unpublished.unpublish()
+        deleted_id = deleted.id
+        deleted.delete()
+
+        response = uclient.get(
+            "/api/v2/pages/", {"changed_since": changed_since.isoformat()}
+        )
+        content = response.json()
+        assert sorted(r["id"] for r in content["results"]) == sorted(
+            [republished.id, created.id]
+        )
+        assert [(d["id"], d["action"]) for d in content["deleted"]] == [
+            (unpublished.id, "unpublished"),
+            (deleted_id, "deleted"),
+        ]
+
+        response = uclient.get(
+            "/api/v2/pages/", {"changed_since": content["synced_at"]}
+        )
+        content = response.json()
+        assert content["results"] == []
+        assert content["deleted"] == []
+
+        unpublished.save_revision().publish()
+        response = uclient.get(
+            "/api/v2/pages/", {"changed_since": changed_since.isoformat()}
+        )
+        content = response.json()
+        assert unpublished.id in [r["id"] for r in content["results"]]
+        assert [d["id"] for d in content["deleted"]] == [deleted_id]
+
+    def test_changed_since_safety_window(self, uclient, settings):
+        """
+        synced_at is CHANGED_SINCE_SAFETY_WINDOW seconds before the listing was
+        read, so the next poll lists the pages published just before it again
+        """
+        settings.CHANGED_SINCE_SAFETY_WINDOW = 60
+        changed_since = timezone.now()
+        page = self.create_content_page(title="Published")
+
+        before = timezone.now()
+        response = uclient.get(
+            "/api/v2/pages/", {"changed_since": changed_since.isoformat()}
+        )
+        after = timezone.now()
+        synced_at = datetime.datetime.fromisoformat(response.json()["synced_at"])
+        window = datetime.timedelta(seconds=60)
+        assert before - window <= synced_at <= after - window
+
+        response = uclient.get("/api/v2/pages/", {"changed_since": synced_at})
+        assert [r["id"] for r in response.json()["results"]] == [page.id]
+
+    def test_changed_since_deleted_first_page(self, uclient):
+        """
+        Only the first page of a changed_since listing has the deleted objects and
+        synced_at
+        """
+        changed_since = timezone.now()
+        for i in range(6):
+            self.create_content_page(title=f"Published {i}")
+        deleted = self.create_content_page(title="Deleted")
+        deleted_id = deleted.id
+        deleted.delete()
+
+        params = {"changed_since": changed_since.isoformat()}
+        content = uclient.get("/api/v2/pages/", params).json()
+        assert [d["id"] for d in content["deleted"]] == [deleted_id]
+        assert "synced_at" in content
+
+        content = uclient.get("/api/v2/pages/", {**params, "page": 2}).json()
+        assert len(content["results"]) == 1
+        assert "deleted" not in content
+        assert "synced_at" not in content
+
+        content = uclient.get("/api/v2/pages/", {**params, "cursor": ""}).json()
+        assert [d["id"] for d in content["deleted"]] == [deleted_id]
+        content = uclient.get(content["next"]).json()
+        assert "deleted" not in content
+
+    def test_changed_since_invalid(self, uclient):
+        """
+        changed_since must be a timestamp, and can't be combined with qa
+        """
+        response = uclient.get("/api/v2/pages/?changed_since=yesterday")
+        assert response.status_code == 400
+        assert response.json() == {
+            "changed_since": ["Please provide an ISO 8601 timestamp"]
+        }
+
+        response = uclient.get("/api/v2/pages/?changed_since=2024-01-01&qa=True")
+        assert response.status_code == 400
+        assert response.json() == {
+            "changed_since": ["changed_since can't be combined with qa"]
+        }
+
+    def test_sparse_fields(self, uclient):
+        """
+        With the fields parameter, only the requested fields are included, and
+        the related pages and parents of the pages aren't looked up unless
+        they're requested.
+        """
+        page = self.create_content_page(tags=["tag1"])
+        related = self.create_content_page(title="Related")
+        PageBuilder.link_related(page, [related])
+
+        with (
+            mock.patch(
+                "home.serializers.get_related_pages_in_bulk"
+            ) as get_related_pages,
+            mock.patch("home.serializers.prefetch_parents") as prefetch_parents,
+        ):
+            listing = uclient.get("/api/v2/pages/?fields=_,title,body&whatsapp=true")
+            detail = uclient.get(f"/api/v2/pages/{page.id}/?fields=_,title,tags")
+        get_related_pages.assert_not_called()
+        prefetch_parents.assert_not_called()
+
+        [result, _] = listing.json()["results"]
+        assert list(result) == ["id", "title", "body"]
+        assert (
+            result["body"]["text"]["value"]["message"]
+            == "*Default whatsapp Content 1* 🏥"
+        )
+        assert detail.json() == {"id": page.id, "title": page.title, "tags": ["tag1"]}
+
+        response = uclient.get(
+            f"/api/v2/pages/{page.id}/?fields=_,parent,related_pages"
+        )
+        content = response.json()
+        assert content["meta"] == {
+            "parent": {
+                "id": page.get_parent().id,
+                "meta": {
+                    "type": "home.ContentPageIndex",
+                    "html_url": page.get_parent().get_full_url(),
+                },
+                "title": "Main Menu",
+            }
+        }
+        assert [p["value"] for p in content["related_pages"]] == [related.id]
+
+    def test_batch_view(self, uclient):
+        """
+        The batch endpoint returns the requested pages in the order they were
+        requested, ids first, serialized as they are in the detail view, and
+        records a page view for each of them.
+        """
+        page1 = self.create_content_page(title="Page 1")
+        page2 = self.create_content_page(title="Page 2")
+        page3 = self.create_content_page(title="Page 3")
+
+        response = uclient.get(
+            f"/api/v2/pages/batch/?id={page3.id},{page1.id},999999"
+            f"&slug={page2.slug},{page3.slug},missing&whatsapp=true&message=1"
+        )
+
+        assert response.status_code == 200
+        content = response.json()
+        assert content["count"] == 3
+        assert [r["id"] for r in content["results"]] == [page3.id, page1.id, page2.id]
+        detail = uclient.get(f"/api/v2/pages/{page1.id}/?whatsapp=true&message=1")
+        assert content["results"][1] == detail.json()
+        assert PageView.objects.filter(page=page1).count() == 2
+        assert PageView.objects.filter(page=page2).count() == 1
+        assert PageView.objects.get(page=page3).platform == "whatsapp"
+
+    def test_batch_view_slug_locale(self, uclient):
+        """
+        Slugs are looked up in the requested locale, or in the default locale if
+        no locale is given.
+        """
+        pt, _created = Locale.objects.get_or_create(language_code="pt")
+        home_pt = HomePage.add_root(locale=pt, title="Home (pt)", slug="home-pt")
+        main_menu_en = PageBuilder.build_cpi(
+            HomePage.objects.first(), "main-menu", "Main Menu"
+        )
+        main_menu_pt = PageBuilder.build_cpi(home_pt, "main-menu-pt", "Main Menu")
+        page_en = PageBuilder.build_cp(
+            parent=main_menu_en, slug="page", title="Page (en)", bodies=[]
+        )
+        page_pt = PageBuilder.build_cp(
+            parent=main_menu_pt, slug="page", title="Page (pt)", bodies=[]
+        )
+
+        response = uclient.get("/api/v2/pages/batch/?slug=page")
+        assert [r["id"] for r in response.json()["results"]] == [page_en.id]
+
+        response = uclient.get("/api/v2/pages/batch/?slug=page&locale=pt")
+        assert [r["id"] for r in response.json()["results"]] == [page_pt.id]
+
+        response = uclient.get(
+            f"/api/v2/pages/batch/?id={page_pt.id}&slug=page&locale=pt"
+        )
+        assert [r["id"] for r in response.json()["results"]] == [page_pt.id]
+
+        response = uclient.get(
+            f"/api/v2/pages/batch/?id={page_en.id}&slug=page&locale=pt"
+        )
+        assert [r["id"] for r in response.json()["results"]] == [
+            page_en.id,
+            page_pt.id,
+        ]
+
+    def test_batch_view_number_of_queries(self, uclient):
+        """
+        Fetching a full batch of pages costs the same number of queries as a
+        single page.
+        """
+        pages = [
+            PageBuilder.build_cp(
+                parent=self.create_content_page(title=f"Parent {i}"),
+                slug=f"page-{i}",
+                title=f"Page {i}",
+                bodies=[WABody(f"Page {i}", [WABlk(f"Message {i}")])],
+                tags=[f"tag-{i}"],
+                triggers=[f"trigger-{i}"],
+                quick_replies=[f"reply-{i}"],
+            )
+            for i in range(5)
+        ]
+        ids = ",".join(str(p.id) for p in pages)
+        uclient.get(f"/api/v2/pages/batch/?id={ids}&whatsapp=true")
+
+        with CaptureQueriesContext(connection) as single:
+            uclient.get(f"/api/v2/pages/batch/?id={pages[0].id}&whatsapp=true")
+        with CaptureQueriesContext(connection) as full_batch:
+            response = uclient.get(f"/api/v2/pages/batch/?id={ids}&whatsapp=true")
+
+        results = response.json()["results"]
+        assert [r["title"] for r in results] == [f"Page {i}" for i in range(5)]
+        assert results[4]["tags"] == ["tag-4"]
+        assert results[4]["triggers"] == ["trigger-4"]
+        assert len(full_batch) == len(single)
+
+    def test_batch_view_invalid(self, uclient, settings):
+        """
+        The batch endpoint requires integer page ids or slugs, limits the
+        number of pages in a single request, and doesn't support QA mode.
+        """
+        settings.PAGES_API_BATCH_SIZE = 2
+        page = self.create_content_page()
+
+        response = uclient.get("/api/v2/pages/batch/")
+        assert response.status_code == 400
+        assert response.json() == {"id": ["Please provide page ids or slugs"]}
+
+        response = uclient.get("/api/v2/pages/batch/?id=notint")
+        assert response.status_code == 400
+        assert response.json() == {"id": ["Page ids must be integers"]}
+
+        response = uclient.get(f"/api/v2/pages/batch/?id={page.id},1&slug=a")
+        assert response.status_code == 400
+        assert response.json() == {"id": ["At most 2 pages can be requested at once"]}
+
+        response = uclient.get(f"/api/v2/pages/batch/?id={page.id}&qa=True")
+        assert response.status_code == 400
+        assert response.json() == {"qa": ["QA mode is not supported for batches"]}
+        assert PageView.objects.count() == 0
+
+    def test_related_pages_number_of_queries(self, uclient):
+        """
+        The related pages of every page in a listing are resolved together, so
+        adding more related pages doesn't add more queries.
+        """
+        page1 = self.create_content_page(title="Page 1")
+        page2 = self.create_content_page(title="Page 2")
+        page3 = self.create_content_page(title="Page 3")
+        PageBuilder.link_related(page1, [page2])
+        uclient.get("/api/v2/pages/?whatsapp=true")
+
+        with CaptureQueriesContext(connection) as few_related:
+            uclient.get("/api/v2/pages/?whatsapp=true")
+
+        PageBuilder.link_related(page1, [page3])
+        PageBuilder.link_related(page2, [page1, page3])
+        PageBuilder.link_related(page3, [page1, page2])
+        with CaptureQueriesContext(connection) as many_related:
+            response = uclient.get("/api/v2/pages/?whatsapp=true")
+
+        assert len(many_related) == len(few_related)
+        related = {
+            r["id"]: [(p["value"], p["title"]) for p in r["related_pages"]]
+            for r in response.json()["results"]
+        }
+        assert related == {
+            page1.id: [(page2.id, "Page 2"), (page3.id, "Page 3")],
+            page2.id: [(page1.id, "Page 1"), (page3.id, "Page 3")],
+            page3.id: [(page1.id, "Page 1"), (page2.id, "Page 2")],
+        }
+
+    def test_deleted_related_page(self, uclient):
+        """
+        Related pages that no longer exist are left out of the response.
+        """
+        page1 = self.create_content_page(title="Page 1")
+        page2 = self.create_content_page(title="Page 2")
+        PageBuilder.link_related(page1, [page2])
+        page2.delete()
+
+        response = uclient.get(f"/api/v2/pages/{page1.id}/")
+        assert response.json()["related_pages"] == []
+
     @pytest.mark.parametrize("platform", ALL_PLATFORMS)
     def test_detail_view_content(self, uclient, platform):
         """
@@ -669,6 +1292,43 @@ class TestContentPageAPI:
         with pytest.raises(KeyError):
             body["text"]["type"]
 
+    @pytest.mark.parametrize("platform", ALL_PLATFORMS)
+    def test_detail_view_all_messages(self, uclient, platform):
+        """
+        Fetching a detail page with messages=all returns every <platform> message
+        in the body, and records a single page view.
+        """
+        page = self.create_content_page(body_type=platform, body_count=3)
+        response = uclient.get(f"/api/v2/pages/{page.id}/?{platform}=true&messages=all")
+        body = response.json()["body"]
+
+        assert body["total_messages"] == 3
+        assert [
+            (m["message"], m["next_message"], m["previous_message"])
+            for m in body["messages"]
+        ] == [(1, 2, None), (2, 3, 1), (3, None, 2)]
+        texts = [
+            (
+                m["text"]["value"]["message"]
+                if platform == "whatsapp"
+                else m["text"]["message"]
+            )
+            for m in body["messages"]
+        ]
+        assert texts == [f"*Default {platform} Content {i}* 🏥" for i in range(1, 4)]
+        assert PageView.objects.filter(page=page).count() == 1
+
+    def test_detail_view_all_messages_invalid(self, uclient):
+        """
+        messages only supports the value "all"
+        """
+        page = self.create_content_page()
+        response = uclient.get(f"/api/v2/pages/{page.id}/?whatsapp=true&messages=2")
+        assert response.status_code == 400
+        assert response.json() == [
+            'The only supported value for messages in the query string is "all"'
+        ]
+
     def test_detail_view_no_content_page(self, uclient):
         """
         We get a validation error if we request a page that doesn't exist.
@@ -681,6 +1341,156 @@ class TestContentPageAPI:
         assert content == {"page": ["Page matching query does not exist."]}
         assert content.get("page") == ["Page matching query does not exist."]
 
+    @pytest.fixture()
+    def api_cache(self, settings):
+        settings.PAGES_API_CACHE_TIMEOUT = 60
+        cache.clear()
+        yield
+        cache.clear()
+
+    def test_detail_view_cached(self, uclient, api_cache):
+        """
+        Repeated detail requests are served from the cache, without touching the
+        page, but still record a page view.
+        """
+        page = self.create_content_page(body_count=2)
+        url = f"/api/v2/pages/{page.id}/?whatsapp=true&message=2&data__user=1"
+        first = uclient.get(url)
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = uclient.get(url)
+
+        assert second.json() == first.json()
+        assert not any("wagtailcore_page" in q["sql"] for q in ctx.captured_queries)
+        assert PageView.objects.count() == 2
+        view = PageView.objects.last()
+        assert view.page_id == page.id
+        assert view.revision_id == page.get_latest_revision().id
+        assert view.platform == "whatsapp"
+        assert view.message == 2
+        assert view.data == {"user": "1"}
+
+    def test_detail_view_cache_data_params(self, uclient, api_cache):
+        """
+        The data__ parameters are recorded with the page view, but don't change
+        the response, so requests that only differ in them share a cached
+        response and an ETag.
+        """
+        page = self.create_content_page()
+        url = f"/api/v2/pages/{page.id}/?whatsapp=true"
+        first = uclient.get(f"{url}&data__contact_uuid=1")
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = uclient.get(f"{url}&data__contact_uuid=2")
+
+        assert second.json() == first.json()
+        assert second["ETag"] == first["ETag"]
+        assert not any("wagtailcore_page" in q["sql"] for q in ctx.captured_queries)
+        assert PageView.objects.last().data == {"contact_uuid": "2"}
+
+    def test_detail_view_cache_params(self, uclient, api_cache):
+        """
+        Requests for different channels and messages are cached separately.
+        """
+        page = self.create_content_page(body_count=2)
+
+        response = uclient.get(f"/api/v2/pages/{page.id}/?whatsapp=true&message=1")
+        assert response.json()["body"]["message"] == 1
+        response = uclient.get(f"/api/v2/pages/{page.id}/?whatsapp=true&message=2")
+        assert response.json()["body"]["message"] == 2
+        response = uclient.get(f"/api/v2/pages/{page.id}/")
+        assert response.json()["body"] == {"text": []}
+
+    def test_detail_view_cache_invalidated(self, uclient, api_cache):
+        """
+        Publishing, unpublishing, or saving a revision of a page invalidates the
+        cached responses.
+        """
+        page = self.create_content_page()
+        url = f"/api/v2/pages/{page.id}/?whatsapp=true"
+        revision = uclient.get(url).json()["body"]["revision"]
+
+        page.whatsapp_title = "New title"
+        page.save_revision()
+        content = uclient.get(url).json()
+        assert content["title"] == "default page"
+        assert content["body"]["revision"] != revision
+
+        page.get_latest_revision().publish()
+        assert uclient.get(url).json()["title"] == "New title"
+
+        page.unpublish()
+        assert uclient.get(url).status_code == 404
+
+    def test_detail_view_etag(self, uclient):
+        """
+        Detail responses have an ETag for the page's latest revision and the
+        query parameters. Requests that already have it get a 304 without the
+        page being serialized, and still record a page view.
+        """
+        page = self.create_content_page(body_count=2)
+        url = f"/api/v2/pages/{page.id}/?whatsapp=true&message=1"
+        etag = uclient.get(url)["ETag"]
+
+        with mock.patch.object(
+            ContentPageSerializer, "to_representation"
+        ) as to_representation:
+            response = uclient.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+        to_representation.assert_not_called()
+        assert PageView.objects.count() == 2
+
+        other_message = f"/api/v2/pages/{page.id}/?whatsapp=true&message=2"
+        response = uclient.get(other_message, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+        page.whatsapp_title = "New title"
+        page.save_revision().publish()
+        response = uclient.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()["title"] == "New title"
+        etag = response["ETag"]
+
+        page.unpublish()
+        response = uclient.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 404
+
+    def test_detail_view_etag_related_page_changed(self, uclient):
+        """
+        With the cache disabled, the ETag still changes when a related page
+        changes, since that changes the response
+        """
+        page = self.create_content_page(title="Page")
+        related = self.create_content_page(title="Related")
+        PageBuilder.link_related(page, [related])
+        url = f"/api/v2/pages/{page.id}/?whatsapp=true"
+        etag = uclient.get(url)["ETag"]
+        assert uclient.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        related.whatsapp_title = "New related title"
+        related.save_revision().publish()
+        response = uclient.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        [related_page] = response.json()["related_pages"]
+        assert related_page["title"] == "New related title"
+
+    def test_detail_view_etag_cached(self, uclient, api_cache):
+        """
+        Cached detail responses are revalidated without querying the page
+        """
+        page = self.create_content_page()
+        url = f"/api/v2/pages/{page.id}/?whatsapp=true"
+        etag = uclient.get(url)["ETag"]
+        assert uclient.get(url)["ETag"] == etag
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = uclient.get(url, HTTP_IF_NONE_MATCH=f"W/{etag}")
+
+        assert response.status_code == 304
+        assert not any("wagtailcore_page" in q["sql"] for q in ctx.captured_queries)
+
     def test_wa_image(self, uclient):
         """
         Test that API returns image ID for whatsapp
@@ -1284,6 +2094,77 @@ class TestOrderedContentSetAPI:
         }
         assert content["pages"][0]["tags"] == [t.name for t in self.page1.tags.all()]
 
+    def test_orderedcontent_detail_endpoint_deleted_page(self, uclient):
+        """
+        Pages that have been deleted are listed without an id or title, also when
+        channel titles, related pages and tags are requested.
+        """
+        page = create_page("Deleted Page", tags=["deleted"])
+        self.ordered_content_set.pages.append(("pages", {"contentpage": page}))
+        self.ordered_content_set.save()
+        page.delete()
+
+        response = uclient.get(
+            f"/api/v2/orderedcontent/{self.ordered_content_set.id}/"
+            "?whatsapp=true&show_related=true&show_tags=true"
+        )
+        assert response.status_code == 200
+        [page1, deleted] = response.json()["pages"]
+        assert page1["id"] == self.page1.id
+        assert deleted == {
+            "id": "",
+            "title": "",
+            "time": None,
+            "unit": None,
+            "before_or_after": None,
+            "contact_field": None,
+            "related_pages": [],
+            "tags": [],
+        }
+
+    def test_orderedcontent_pages_number_of_queries(self, uclient):
+        """
+        The pages of all the ordered content sets in a response are loaded
+        together, so the number of queries doesn't depend on the number of pages
+        """
+        listing_url = "/api/v2/orderedcontent/"
+        detail_url = (
+            f"/api/v2/orderedcontent/{self.ordered_content_set.id}/"
+            "?show_tags=true&show_related=true"
+        )
+        uclient.get(listing_url)
+        with CaptureQueriesContext(connection) as listing_few_pages:
+            uclient.get(listing_url)
+        with CaptureQueriesContext(connection) as detail_few_pages:
+            uclient.get(detail_url)
+
+        for i in range(5):
+            page = create_page(f"Member page {i}", tags=[f"tag{i}"])
+            self.ordered_content_set.pages.append(("pages", {"contentpage": page}))
+            self.ordered_content_set_timed.pages.append(
+                ("pages", {"contentpage": page})
+            )
+        self.ordered_content_set.save()
+        self.ordered_content_set_timed.save()
+
+        with CaptureQueriesContext(connection) as listing_many_pages:
+            response = uclient.get(listing_url)
+        [ocs, ocs_timed] = response.json()["results"]
+        assert len(ocs["pages"]) == 6
+        assert len(ocs_timed["pages"]) == 6
+        assert len(listing_many_pages.captured_queries) == len(
+            listing_few_pages.captured_queries
+        )
+
+        with CaptureQueriesContext(connection) as detail_many_pages:
+            response = uclient.get(detail_url)
+        pages = response.json()["pages"]
+        assert len(pages) == 6
+        assert all("tags" in page and "related_pages" in page for page in pages)
+        assert len(detail_many_pages.captured_queries) == len(
+            detail_few_pages.captured_queries
+        )
+
     def test_orderedcontent_endpoint_with_drafts(self, uclient):
         """
         Unpublished ordered content sets are returned if the qa param is set.
@@ -1396,6 +2277,22 @@ class TestOrderedContentSetAPI:
         assert response.status_code == 200
         assert content["count"] == 2
 
+    def test_orderedcontent_endpoint_filter_profile_fields_in_database(self, uclient):
+        """
+        Without the qa param, profile fields are filtered in the database instead
+        of by loading every ordered content set
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            response = uclient.get("/api/v2/orderedcontent/?gender=female")
+        assert response.json()["count"] == 2
+        ocs_queries = [
+            q["sql"]
+            for q in ctx.captured_queries
+            if 'FROM "home_orderedcontentset"' in q["sql"]
+        ]
+        assert len(ocs_queries) == 2
+        assert all('"profile_gender"' in sql for sql in ocs_queries)
+
     def test_orderedcontent_endpoint_filter_on_age_profile_field(self, uclient):
         """
         The correct ordered content sets are returned if the filter is applied.
@@ -1774,6 +2671,126 @@ class TestOrderedContentSetAPI:
             "contact_field": "something",
         }
 
+    def test_orderedcontent_qa_filtered_new_draft(self, uclient):
+        """
+        Filtering by slug with the qa param set still returns the new revision
+        """
+        self.ordered_content_set.name = "Test set draft"
+        self.ordered_content_set.save_revision()
+
+        response = uclient.get("/api/v2/orderedcontent/?qa=True&slug=ordered-set-1")
+        content = response.json()
+        assert content["count"] == 1
+        assert content["results"][0]["name"] == "Test set draft"
+
+    def test_orderedcontent_qa_number_of_queries(self, uclient):
+        """
+        The latest revisions of the ordered content sets are fetched in a single
+        query, rather than a query per ordered content set
+        """
+        uclient.get("/api/v2/orderedcontent/?qa=True")
+        with CaptureQueriesContext(connection) as few_sets:
+            uclient.get("/api/v2/orderedcontent/?qa=True")
+
+        for i in range(3):
+            ocs = OrderedContentSet(
+                name=f"Extra set {i}", slug=f"extra-set-{i}", locale=self.default_locale
+            )
+            ocs.save()
+            ocs.save_revision()
+
+        with CaptureQueriesContext(connection) as many_sets:
+            response = uclient.get("/api/v2/orderedcontent/?qa=True")
+        assert response.json()["count"] == 5
+        assert len(many_sets.captured_queries) == len(few_sets.captured_queries)
+
+    @pytest.mark.parametrize("qa", ["", "&qa=True"])
+    def test_orderedcontent_cursor_pagination(self, uclient, qa):
+        """
+        With a cursor, ordered content sets are paged through in primary key
+        order, including in QA mode.
+        """
+        for i in range(5):
+            ocs = OrderedContentSet(
+                name=f"Extra set {i}", slug=f"extra-set-{i}", locale=self.default_locale
+            )
+            ocs.save()
+            ocs.save_revision().publish()
+
+        names = []
+        url = f"/api/v2/orderedcontent/?cursor={qa}"
+        while url:
+            content = uclient.get(url).json()
+            assert "count" not in content
+            names.extend(r["name"] for r in content["results"])
+            url = content["next"]
+
+        assert names == [ocs.name for ocs in OrderedContentSet.objects.order_by("pk")]
+
+    def test_orderedcontent_changed_since(self, uclient):
+        """
+        With changed_since, only the ordered content sets published after that
+        time are listed, along with the ones deleted after it.
+        """
+        changed_since = timezone.now()
+        ocs = OrderedContentSet(
+            name="New set", slug="new-set", locale=self.default_locale
+        )
+        ocs.save()
+        ocs.save_revision().publish()
+        deleted_id = self.ordered_content_set_timed.id
+        self.ordered_content_set_timed.delete()
+
+        response = uclient.get(
+            "/api/v2/orderedcontent/", {"changed_since": changed_since.isoformat()}
+        )
+        content = response.json()
+        assert [r["name"] for r in content["results"]] == ["New set"]
+        assert [(d["id"], d["action"]) for d in content["deleted"]] == [
+            (deleted_id, "deleted")
+        ]
+
+    def test_orderedcontent_changed_since_saved(self, uclient):
+        """
+        Ordered content sets that are saved without publishing a revision, as the
+        importer does, are listed with changed_since.
+        """
+        changed_since = timezone.now()
+        self.ordered_content_set.name = "Imported"
+        self.ordered_content_set.save()
+
+        response = uclient.get(
+            "/api/v2/orderedcontent/", {"changed_since": changed_since.isoformat()}
+        )
+        assert [r["name"] for r in response.json()["results"]] == ["Imported"]
+
+    def test_orderedcontent_detail_etag(self, uclient):
+        """
+        Ordered content set detail responses have an ETag, and requests that
+        already have it get a 304 until the set is changed.
+        """
+        url = f"/api/v2/orderedcontent/{self.ordered_content_set.id}/"
+        etag = uclient.get(url)["ETag"]
+
+        response = uclient.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response.content == b""
+
+        self.ordered_content_set.name = "Renamed"
+        self.ordered_content_set.save_revision().publish()
+        response = uclient.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()["name"] == "Renamed"
+
+        # Saving without publishing a revision, as the importer does
+        etag = response["ETag"]
+        self.ordered_content_set.name = "Imported"
+        self.ordered_content_set.save()
+        response = uclient.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()["name"] == "Imported"
+        assert response["ETag"] != etag
+
     def test_orderedcontent_moderation(self):
         """
         Get default workflow for ordered content set
@@ -1823,6 +2840,68 @@ class TestOrderedContentSetAPI:
         )
 
 
+@pytest.mark.django_db
+class TestWhatsAppTemplateAPI:
+    @pytest.fixture(autouse=True)
+    def create_test_data(self):
+        self.template = WhatsAppTemplate(
+            name="wa_title",
+            message="Test WhatsApp Message 1",
+            category="UTILITY",
+            locale=Locale.objects.get(language_code="en"),
+        )
+        self.template.save()
+        self.template.save_revision().publish()
+
+    def test_whatsapp_template_qa_name_from_draft(self):
+        """
+        With the qa param set, only the name of a template comes from its latest
+        revision
+        """
+        self.template.name = "wa_title_draft"
+        self.template.message = "Draft message"
+        self.template.save_revision()
+
+        [template] = WhatsAppTemplateViewset().overlay_latest_revisions(
+            WhatsAppTemplate.objects.select_related("latest_revision")
+        )
+        assert template.name == "wa_title_draft"
+        assert template.message == "Test WhatsApp Message 1"
+
+    def test_whatsapp_template_qa(self, uclient):
+        """
+        The qa listing and detail views return the templates with drafts
+        """
+        self.template.name = "wa_title_draft"
+        self.template.save_revision()
+
+        response = uclient.get("/api/v2/whatsapptemplates/?qa=True")
+        [result] = response.json()["results"]
+        assert result["id"] == self.template.id
+
+        response = uclient.get(f"/api/v2/whatsapptemplates/{self.template.id}/?qa=True")
+        assert response.status_code == 200
+
+    def test_whatsapp_template_changed_since_saved(self, uclient):
+        """
+        Templates that are saved without publishing a revision, as the importer
+        does, are listed with changed_since.
+        """
+        changed_since = timezone.now()
+        WhatsAppTemplate(
+            name="imported",
+            message="Imported message",
+            category="UTILITY",
+            locale=Locale.objects.get(language_code="en"),
+        ).save()
+
+        response = uclient.get(
+            "/api/v2/whatsapptemplates/", {"changed_since": changed_since.isoformat()}
+        )
+        [result] = response.json()["results"]
+        assert result["id"] == WhatsAppTemplate.objects.get(name="imported").id
+
+
 @pytest.mark.django_db
 class TestAssessmentAPI:
     @pytest.fixture(autouse=True)
@@ -2662,6 +3741,76 @@ class TestAssessmentAPI:
             "triggers": [],
         }
 
+    def test_assessment_qa_deleted_draft_page(self, uclient):
+        """
+        If a page referred to by the latest revision has been deleted, it is
+        returned as null with the qa param set
+        """
+        high_result_page = ContentPage(title="new high result", slug="new-high-result")
+        homepage = HomePage.objects.first()
+        homepage.add_child(instance=high_result_page)
+        self.assessment.high_result_page = high_result_page
+        self.assessment.save_revision()
+        high_result_page.delete()
+
+        response = uclient.get("/api/v2/assessment/?qa=True")
+        [result] = response.json()["results"]
+        assert result["high_result_page"] is None
+        assert result["medium_result_page"]["id"] == self.medium_result_page.id
+
+    def test_assessment_qa_number_of_queries(self, uclient):
+        """
+        The number of queries for the qa listing doesn't depend on the number of
+        assessments
+        """
+
+        def create_assessment(i):
+            assessment = Assessment(
+                title=f"Extra {i}",
+                slug=f"extra-{i}",
+                locale=self.assessment.locale,
+                generic_error="error",
+            )
+            assessment.save()
+            assessment.save_revision()
+
+        create_assessment(0)
+        uclient.get("/api/v2/assessment/?qa=True")
+        with CaptureQueriesContext(connection) as few_assessments:
+            uclient.get("/api/v2/assessment/?qa=True")
+
+        for i in range(1, 4):
+            create_assessment(i)
+
+        with CaptureQueriesContext(connection) as many_assessments:
+            response = uclient.get("/api/v2/assessment/?qa=True")
+        assert response.json()["count"] == 5
+        assert len(many_assessments.captured_queries) == len(
+            few_assessments.captured_queries
+        )
+
+    def test_assessment_cursor_pagination(self, uclient):
+        """
+        With a cursor, the QA listing of assessments is paged through in primary
+        key order.
+        """
+        for i in range(5):
+            Assessment.objects.create(
+                title=f"Extra {i}",
+                slug=f"extra-{i}",
+                locale=self.assessment.locale,
+                generic_error="error",
+            ).save_revision()
+
+        titles = []
+        url = "/api/v2/assessment/?cursor=&qa=True"
+        while url:
+            content = uclient.get(url).json()
+            titles.extend(r["title"] for r in content["results"])
+            url = content["next"]
+
+        assert titles == [a.title for a in Assessment.objects.order_by("pk")]
+
     def test_assessment_endpoint_filter_by_tag(self, uclient):
         response = uclient.get("/api/v2/assessment/?tag=tag1")
         content = json.loads(response.content)
@@ -95,6 +95,7 @@ def _update_field(
 PAGE_TIMESTAMP_FIELDS = {
     "first_published_at",
     "last_published_at",
+    "updated_at",
 }
 
 
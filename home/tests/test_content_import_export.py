@@ -272,6 +272,11 @@ def remove_timestamps(pages: DbDicts) -> DbDicts:
     return _remove_fields(pages, PAGE_TIMESTAMP_FIELDS)
 
 
+def remove_message_manifests(pages: DbDicts) -> DbDicts:
+    # The manifest is derived from the message bodies, which are compared already
+    return _remove_fields(pages, {"message_manifest"})
+
+
 def _normalise_varmsg_ids(page_id: str, var_list: list[dict[str, Any]]) -> None:
     for i, varmsg in enumerate(var_list):
         assert "id" in varmsg
@@ -387,6 +392,7 @@ PAGE_FILTER_FUNCS = [
     normalise_pks,
     normalise_revisions,
     remove_timestamps,
+    remove_message_manifests,
     normalise_body_ids,
     normalise_related_page_ids,
     clean_web_paragraphs,
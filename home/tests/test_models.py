@@ -15,6 +15,7 @@ from wagtail.images import get_image_model
 from wagtail.models import (
     Locale,  # type: ignore
     Page,
+    Revision,
     Workflow,
     WorkflowState,
 )
@@ -89,6 +90,68 @@ class ContentPageTests(TestCase):
         self.assertEqual(view.revision.id, page.get_latest_revision().id)
         self.assertEqual(view.data, {"save": "this"})
 
+    def test_save_page_view_revision(self):
+        """
+        Page views are attributed to the latest revision without fetching it
+        """
+        page = create_page()
+        page.save_revision()
+        page = ContentPage.objects.get(id=page.id)
+
+        with self.assertNumQueries(1):
+            page.save_page_view({})
+
+        view = PageView.objects.last()
+        self.assertEqual(view.revision, Revision.objects.latest("id"))
+
+    def test_message_manifest(self):
+        """
+        The message manifest is built when the page is saved, including when a
+        revision is published, but isn't stored in revisions
+        """
+        page = create_page(add_variation=True)
+        page.refresh_from_db()
+        [message] = page.message_manifest["whatsapp"]
+        self.assertEqual(message["value"]["message"], "Test WhatsApp Message 1")
+        self.assertEqual(
+            message["value"]["variation_messages"],
+            [
+                {
+                    "profile_field": "gender",
+                    "value": "female",
+                    "message": "Test Title - female variation",
+                }
+            ],
+        )
+        self.assertEqual(page.message_manifest["sms"], [])
+
+        page.sms_body = [("SMS_Message", {"message": "SMS message"})]
+        revision = page.save_revision()
+        self.assertNotIn("message_manifest", revision.content)
+        page.refresh_from_db()
+        self.assertEqual(page.message_manifest["sms"], [])
+
+        revision.publish()
+        page.refresh_from_db()
+        self.assertEqual(
+            [m["message"] for m in page.message_manifest["sms"]], ["SMS message"]
+        )
+
+    def test_message_manifest_new_blocks(self):
+        """
+        New message blocks have the ids in the manifest that they are saved with
+        """
+        page = create_page()
+        page.whatsapp_body = [("Whatsapp_Message", {"message": "New message"})]
+        page.save()
+        page.refresh_from_db()
+
+        [block] = page.whatsapp_body.raw_data
+        [message] = page.message_manifest["whatsapp"]
+        self.assertIsNotNone(block["id"])
+        self.assertEqual(message["id"], block["id"])
+        self.assertEqual(message["value"]["message"], "New message")
+
     @mock.patch("home.models.create_whatsapp_template")
     def test_template_create_on_save_deactivated(self, mock_create_whatsapp_template):
         create_page(is_whatsapp_template=True)
@@ -620,6 +683,35 @@ class OrderedContentSetTests(TestCase):
         ordered_content_set.save()
         self.assertEqual(ordered_content_set.get_gender(), "female")
 
+    def test_profile_columns(self):
+        """
+        The profile field columns are updated from profile_fields when the set is
+        saved, and when a revision is published
+        """
+        ordered_content_set = OrderedContentSet(
+            name="Test Title",
+            slug="ordered-set-2",
+            locale=Locale.objects.get(language_code="en"),
+        )
+        ordered_content_set.profile_fields.append(("gender", "female"))
+        ordered_content_set.profile_fields.append(("age", "18-24"))
+        ordered_content_set.save()
+        ordered_content_set.refresh_from_db()
+        self.assertEqual(ordered_content_set.profile_gender, "female")
+        self.assertEqual(ordered_content_set.profile_age, "18-24")
+        self.assertEqual(ordered_content_set.profile_relationship, "")
+
+        ordered_content_set.profile_fields = [("relationship", "single")]
+        ordered_content_set.save_revision()
+        ordered_content_set.refresh_from_db()
+        self.assertEqual(ordered_content_set.profile_gender, "female")
+
+        ordered_content_set.latest_revision.publish()
+        ordered_content_set.refresh_from_db()
+        self.assertEqual(ordered_content_set.profile_gender, "")
+        self.assertEqual(ordered_content_set.profile_age, "")
+        self.assertEqual(ordered_content_set.profile_relationship, "single")
+
     def test_status_draft(self):
         """
         Draft Ordered Content Sets should return a draft status
@@ -0,0 +1,169 @@
+import datetime
+from io import StringIO
+from typing import Any
+
+import pytest
+from django.core.management import call_command  # type: ignore
+from django.db.models import Count, Model  # type: ignore
+from django.utils import timezone  # type: ignore
+
+from home.models import (
+    ContentPage,
+    PageView,
+    PageViewCounter,
+    PageViewDailyRollup,
+    PageViewMonthlyRollup,
+)
+from home.page_view_rollups import (
+    annotate_view_counts,
+    get_views_per_month,
+    roll_up_page_views,
+)
+
+from .utils import create_page
+
+
+def add_view(
+    page: ContentPage,
+    timestamp: datetime.datetime,
+    platform: str = "whatsapp",
+    message: int | None = None,
+) -> PageView:
+    view = PageView.objects.create(
+        page=page,
+        revision=page.get_latest_revision(),
+        platform=platform,
+        message=message,
+    )
+    PageView.objects.filter(id=view.id).update(timestamp=timezone.make_aware(timestamp))
+    return view
+
+
+def rollups(model: type[Model]) -> list[Any]:
+    return sorted(
+        model.objects.values_list("date", "page__title", "platform", "message", "count")
+    )
+
+
+@pytest.mark.django_db
+class TestPageViewRollups:
+    def test_roll_up_page_views(self) -> None:
+        """
+        The command adds page views to the daily and monthly rollups, per page,
+        platform and message, and only adds each page view once
+        """
+        page1 = create_page("Page 1")
+        page2 = create_page("Page 2")
+        add_view(page1, datetime.datetime(2024, 1, 1, 10), message=1)
+        add_view(page1, datetime.datetime(2024, 1, 1, 11), message=1)
+        add_view(page1, datetime.datetime(2024, 1, 2, 10), message=1)
+        add_view(page1, datetime.datetime(2024, 1, 2, 10), platform="sms")
+        add_view(page2, datetime.datetime(2024, 2, 3, 10))
+
+        stdout = StringIO()
+        call_command("rollup_page_views", "--batch-size", "2", stdout=stdout)
+        assert stdout.getvalue() == "Added 5 page views to the rollups\n"
+        assert roll_up_page_views() == 0
+
+        jan1, jan2 = datetime.date(2024, 1, 1), datetime.date(2024, 1, 2)
+        assert rollups(PageViewDailyRollup) == [
+            (jan1, "Page 1", "whatsapp", 1, 2),
+            (jan2, "Page 1", "sms", None, 1),
+            (jan2, "Page 1", "whatsapp", 1, 1),
+            (datetime.date(2024, 2, 3), "Page 2", "whatsapp", None, 1),
+        ]
+        assert rollups(PageViewMonthlyRollup) == [
+            (jan1, "Page 1", "sms", None, 1),
+            (jan1, "Page 1", "whatsapp", 1, 3),
+            (datetime.date(2024, 2, 1), "Page 2", "whatsapp", None, 1),
+        ]
+
+        add_view(page1, datetime.datetime(2024, 1, 20, 10), message=1)
+        assert roll_up_page_views() == 1
+        assert (jan1, "Page 1", "whatsapp", 1, 4) in rollups(PageViewMonthlyRollup)
+
+    def test_recent_page_views(self) -> None:
+        """
+        Page views from the last few minutes aren't rolled up yet, but they are
+        still counted in the views per month. The stored view counters only
+        include the page views that have been rolled up.
+        """
+        page = create_page()
+        now = timezone.localtime()
+        add_view(page, datetime.datetime(2024, 1, 1, 10))
+        page.views.create(revision=page.get_latest_revision(), platform="whatsapp")
+
+        assert roll_up_page_views() == 1
+        month = now.date().replace(day=1)
+        assert get_views_per_month() == [(datetime.date(2024, 1, 1), 1), (month, 1)]
+        [page] = annotate_view_counts(ContentPage.objects.filter(id=page.id))
+        assert page.view_counter == 1
+
+    def test_get_views_per_month_filters(self) -> None:
+        """
+        The views per month can be filtered by platform, page and time, and
+        include both rolled up and recent page views
+        """
+        page1 = create_page("Page 1")
+        page2 = create_page("Page 2")
+        add_view(page1, datetime.datetime(2024, 1, 1, 10))
+        add_view(page1, datetime.datetime(2024, 1, 31, 10), platform="sms")
+        add_view(page2, datetime.datetime(2024, 2, 1, 10))
+        roll_up_page_views()
+        add_view(page1, datetime.datetime(2024, 1, 15, 10))
+        add_view(page2, datetime.datetime(2024, 2, 15, 10))
+
+        jan, feb = datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)
+        assert get_views_per_month() == [(jan, 3), (feb, 2)]
+        assert get_views_per_month(platform="whatsapp") == [(jan, 2), (feb, 2)]
+        assert get_views_per_month(page=page2) == [(feb, 2)]
+
+        start = timezone.make_aware(datetime.datetime(2024, 1, 15))
+        end = timezone.make_aware(datetime.datetime(2024, 2, 1))
+        assert get_views_per_month(start=start, end=end) == [(jan, 2)]
+        assert get_views_per_month(start=start) == [(jan, 2), (feb, 2)]
+        assert get_views_per_month(end=end) == [(jan, 3)]
+
+    def test_page_view_counters(self) -> None:
+        """
+        Rolling up page views also updates the view counter of each page, with
+        the number of page views per platform and when it was last viewed
+        """
+        page1 = create_page("Page 1")
+        page2 = create_page("Page 2")
+        add_view(page1, datetime.datetime(2024, 1, 1, 10))
+        add_view(page1, datetime.datetime(2024, 1, 3, 10), platform="sms")
+        roll_up_page_views()
+        add_view(page1, datetime.datetime(2024, 1, 2, 10))
+        roll_up_page_views()
+
+        counter = PageViewCounter.objects.get(page=page1)
+        assert counter.count == 3
+        assert counter.platforms == {"whatsapp": 2, "sms": 1}
+        assert counter.last_viewed_at == timezone.make_aware(
+            datetime.datetime(2024, 1, 3, 10)
+        )
+        assert not PageViewCounter.objects.filter(page=page2).exists()
+
+        [p1, p2] = annotate_view_counts(
+            ContentPage.objects.filter(id__in=[page1.id, page2.id]).order_by("id")
+        )
+        assert (p1.view_counter, p1.last_viewed_at) == (3, counter.last_viewed_at)
+        assert (p2.view_counter, p2.last_viewed_at) == (0, None)
+
+    def test_annotate_view_counts(self) -> None:
+        """
+        The view count of each page is the same as counting its rolled up page
+        views
+        """
+        pages = [create_page(f"Page {i}") for i in range(3)]
+        for i, page in enumerate(pages):
+            for day in range(i * 2):
+                add_view(page, datetime.datetime(2024, 1, day + 1, 10))
+        roll_up_page_views()
+
+        counted = ContentPage.objects.annotate(views_count=Count("views"))
+        assert {p.id: p.views_count for p in counted} == {
+            p.id: p.view_counter
+            for p in annotate_view_counts(ContentPage.objects.all())
+        }
@@ -0,0 +1,158 @@
+import time
+from collections.abc import Iterator
+from typing import Any
+from unittest import mock
+
+import pytest
+from django.db import IntegrityError, OperationalError  # type: ignore
+
+from home.models import ContentPage, PageView
+from home.page_views import PageViewRecorder, record_page_view
+
+from .utils import create_page
+
+
+def page_view(page: ContentPage, **kwargs: Any) -> PageView:
+    return PageView(
+        page_id=page.id,
+        revision_id=page.get_latest_revision().id,
+        platform="whatsapp",
+        **kwargs,
+    )
+
+
+@pytest.fixture()
+def recorder() -> Iterator[PageViewRecorder]:
+    recorder = PageViewRecorder(flush_size=3, flush_interval=60, buffer_size=5)
+    yield recorder
+    recorder.stop()
+
+
+@pytest.fixture()
+def foreground_recorder(
+    recorder: PageViewRecorder, monkeypatch: pytest.MonkeyPatch
+) -> PageViewRecorder:
+    """
+    A recorder that doesn't start its background thread, since the thread's
+    database connection can't see the test's transaction
+    """
+    monkeypatch.setattr(recorder, "start", lambda: None)
+    return recorder
+
+
+@pytest.mark.django_db
+class TestPageViewRecorder:
+    def test_record_buffers_page_views(
+        self, foreground_recorder: PageViewRecorder
+    ) -> None:
+        """
+        Recorded page views are only written when the recorder is flushed
+        """
+        recorder = foreground_recorder
+        page = create_page()
+        recorder.record(page_view(page, message=1))
+        recorder.record(page_view(page, message=2))
+        assert PageView.objects.count() == 0
+
+        assert recorder.flush() == 2
+        assert sorted(PageView.objects.values_list("message", flat=True)) == [1, 2]
+        assert recorder.flush() == 0
+
+    def test_back_pressure(self, foreground_recorder: PageViewRecorder) -> None:
+        """
+        If the buffer is full, recording a page view writes out the buffer instead
+        of dropping page views
+        """
+        recorder = foreground_recorder
+        page = create_page()
+        for i in range(6):
+            recorder.record(page_view(page, message=i))
+
+        assert PageView.objects.count() == 5
+        recorder.flush()
+        assert PageView.objects.count() == 6
+
+    def test_stop_writes_queued_page_views(
+        self, foreground_recorder: PageViewRecorder
+    ) -> None:
+        """
+        Stopping the recorder, as happens when the process exits, writes out the
+        queued page views
+        """
+        recorder = foreground_recorder
+        page = create_page()
+        recorder.record(page_view(page))
+        recorder.stop()
+
+        assert PageView.objects.count() == 1
+
+    def test_flush_failure(self, foreground_recorder: PageViewRecorder) -> None:
+        """
+        If a batch can't be written, it is kept and written by the next flush
+        """
+        recorder = foreground_recorder
+        page = create_page()
+        recorder.record(page_view(page, message=1))
+        recorder.record(page_view(page, message=2))
+
+        with mock.patch.object(
+            PageView.objects, "bulk_create", side_effect=OperationalError
+        ), pytest.raises(OperationalError):
+            recorder.flush()
+        assert PageView.objects.count() == 0
+
+        recorder.record(page_view(page, message=3))
+        assert recorder.flush() == 3
+        assert sorted(PageView.objects.values_list("message", flat=True)) == [1, 2, 3]
+        assert recorder.flush() == 0
+
+    def test_flush_drops_unwritable_page_views(
+        self, foreground_recorder: PageViewRecorder
+    ) -> None:
+        """
+        Only the page views that can't be written, eg. because their page was
+        deleted, are dropped from a batch
+        """
+        recorder = foreground_recorder
+        page = create_page()
+        for i in range(3):
+            recorder.record(page_view(page, message=i))
+
+        save = PageView.save
+
+        def save_unless_deleted(self: PageView, *args: Any, **kwargs: Any) -> None:
+            if self.message == 1:
+                raise IntegrityError("FOREIGN KEY constraint failed")
+            save(self, *args, **kwargs)
+
+        with mock.patch.object(
+            PageView.objects, "bulk_create", side_effect=IntegrityError
+        ), mock.patch.object(PageView, "save", save_unless_deleted):
+            assert recorder.flush() == 2
+        assert sorted(PageView.objects.values_list("message", flat=True)) == [0, 2]
+        assert recorder.flush() == 0
+
+    def test_record_page_view_unbuffered(self, settings: Any) -> None:
+        """
+        Page views are saved immediately if buffering is turned off
+        """
+        settings.PAGE_VIEW_BUFFERING = False
+        page = create_page()
+        record_page_view(page_view(page))
+        assert PageView.objects.count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_background_flush(recorder: PageViewRecorder) -> None:
+    """
+    The background thread writes the queued page views as soon as there are
+    flush_size of them
+    """
+    page = create_page()
+    for _ in range(3):
+        recorder.record(page_view(page))
+
+    deadline = time.monotonic() + 10
+    while PageView.objects.count() < 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert PageView.objects.count() == 3
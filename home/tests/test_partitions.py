@@ -0,0 +1,223 @@
+import datetime
+import gzip
+import importlib
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError, call_command  # type: ignore
+from django.db import connection  # type: ignore
+from django.utils import timezone  # type: ignore
+
+from home.models import PageView
+from home.partitions import (
+    PartitionError,
+    add_months,
+    create_partitions,
+    drop_partitions,
+    get_partitions,
+    is_partitioned,
+)
+
+from .utils import create_page
+
+postgres_only = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Partitioning needs PostgreSQL"
+)
+
+
+def test_add_months() -> None:
+    """
+    add_months returns the first day of a month before or after a date
+    """
+    assert add_months(datetime.date(2024, 1, 31), 1) == datetime.date(2024, 2, 1)
+    assert add_months(datetime.date(2024, 11, 15), 3) == datetime.date(2025, 2, 1)
+    assert add_months(datetime.date(2024, 1, 15), -1) == datetime.date(2023, 12, 1)
+    assert add_months(datetime.date(2024, 3, 1), 0) == datetime.date(2024, 3, 1)
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor == "postgresql", reason="Needs another database")
+def test_manage_partitions_unsupported() -> None:
+    """
+    The command refuses to run on databases other than PostgreSQL
+    """
+    with pytest.raises(CommandError, match="only supported on PostgreSQL"):
+        call_command("manage_partitions")
+
+
+@pytest.mark.django_db
+@postgres_only
+class TestPartitions:
+    def test_create_partitions(self) -> None:
+        """
+        The command creates a partition for each of the coming months
+        """
+        stdout = StringIO()
+        call_command("manage_partitions", "--months-ahead", "6", stdout=stdout)
+        call_command("manage_partitions", "--months-ahead", "6", stdout=stdout)
+
+        last_month = add_months(timezone.now().date(), 6)
+        for table in ["home_pageview", "home_contentpagerating"]:
+            name, upper = get_partitions(connection, table)[-1]
+            assert name == f"{table}_p{last_month:%Y%m}"
+            assert upper == add_months(last_month, 1)
+        # Partitions are only created once
+        assert stdout.getvalue().count(f"home_pageview_p{last_month:%Y%m}") == 1
+
+    def test_drop_partitions(self, tmp_path: Path) -> None:
+        """
+        Partitions older than the retention period are written to a gzipped CSV
+        file and dropped, and page views in the newer partitions are kept
+        """
+        page = create_page()
+        today = timezone.now().date()
+        old = page.views.create(revision=page.get_latest_revision())
+        new = page.views.create(revision=page.get_latest_revision())
+        next_month = add_months(today, 1)
+        create_partitions(connection, "home_pageview", 2)
+        PageView.objects.filter(id=new.id).update(
+            timestamp=timezone.make_aware(
+                datetime.datetime.combine(next_month, datetime.time(12))
+            )
+        )
+        # A partition can't be dropped while foreign keys of rows inserted in the
+        # same transaction are waiting to be checked
+        connection.check_constraints()
+
+        dropped = drop_partitions(
+            connection, "home_pageview", 0, tmp_path, today=next_month
+        )
+        assert dropped == ["home_pageview_legacy"]
+        assert list(PageView.objects.values_list("id", flat=True)) == [new.id]
+        with gzip.open(tmp_path / "home_pageview_legacy.csv.gz", "rt") as f:
+            header, row = f.read().splitlines()
+        assert header.startswith("id,")
+        assert row.startswith(f"{old.id},")
+
+    def test_drop_partitions_not_rolled_up(self) -> None:
+        """
+        Partitions with page views that haven't been rolled up aren't dropped
+        """
+        page = create_page()
+        view = page.views.create(revision=page.get_latest_revision())
+        next_month = add_months(timezone.now().date(), 1)
+        connection.check_constraints()
+
+        with pytest.raises(PartitionError, match="home_pageview_legacy has rows"):
+            drop_partitions(
+                connection, "home_pageview", 0, today=next_month, max_id=view.id - 1
+            )
+        assert PageView.objects.filter(id=view.id).exists()
+
+        dropped = drop_partitions(
+            connection, "home_pageview", 0, today=next_month, max_id=view.id
+        )
+        assert dropped == ["home_pageview_legacy"]
+        assert not PageView.objects.filter(id=view.id).exists()
+
+    def test_create_partitions_moves_default_rows(self) -> None:
+        """
+        Rows for a new partition that are in the default partition are moved
+        into it
+        """
+        page = create_page()
+        view = page.views.create(revision=page.get_latest_revision())
+        month = add_months(timezone.now().date(), 12)
+        PageView.objects.filter(id=view.id).update(
+            timestamp=timezone.make_aware(
+                datetime.datetime.combine(month, datetime.time(12))
+            )
+        )
+        connection.check_constraints()
+
+        created = create_partitions(connection, "home_pageview", 12)
+        assert created[-1] == f"home_pageview_p{month:%Y%m}"
+        with connection.cursor() as cursor:
+            partition = f"home_pageview_p{month:%Y%m}"
+            cursor.execute(f"SELECT id FROM {partition}")  # noqa: S608
+            assert cursor.fetchall() == [(view.id,)]
+            cursor.execute("SELECT COUNT(*) FROM home_pageview_default")
+            assert cursor.fetchone() == (0,)
+        assert PageView.objects.get(id=view.id).page_id == page.id
+
+    def test_partition_table_migration(self) -> None:
+        """
+        The migration replaces a table with one partitioned by month, keeping its
+        rows, ids, and the names of its primary key, indexes and foreign keys
+        """
+        migration = importlib.import_module("home.migrations.0097_partition_page_views")
+        page = create_page()
+        today = datetime.date(2024, 1, 15)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE partition_test (id bigserial, "
+                "timestamp timestamptz NOT NULL, page_id integer NOT NULL, "
+                "platform varchar(20) NOT NULL, "
+                "CONSTRAINT partition_test_pk PRIMARY KEY (id), "
+                "CONSTRAINT partition_test_page_fk FOREIGN KEY (page_id) "
+                "REFERENCES wagtailcore_page (id) DEFERRABLE INITIALLY DEFERRED)"
+            )
+            cursor.execute(
+                "CREATE INDEX partition_test_page ON partition_test (page_id)"
+            )
+            cursor.execute(
+                "CREATE INDEX partition_test_platform_like "
+                "ON partition_test (platform varchar_pattern_ops)"
+            )
+            cursor.execute(
+                "INSERT INTO partition_test (timestamp, page_id, platform) "
+                "VALUES ('2024-01-10', %s, 'web')",
+                [page.id],
+            )
+            connection.check_constraints()
+            names = set(
+                connection.introspection.get_constraints(cursor, "partition_test")
+            )
+
+            migration.prepare_table(
+                connection, "partition_test", datetime.date(2024, 2, 1), False
+            )
+            # Postgres says when it doesn't need to scan a table to attach it
+            cursor.execute("SET LOCAL client_min_messages = debug1")
+            del connection.connection.notices[:]
+            migration.partition_table(connection, "partition_test", today)
+            notices = list(connection.connection.notices)
+            cursor.execute("SET LOCAL client_min_messages = notice")
+            assert any(
+                'partition constraint for table "partition_test_legacy" is implied'
+                in notice
+                for notice in notices
+            )
+
+            assert is_partitioned(connection, "partition_test")
+            assert get_partitions(connection, "partition_test") == [
+                ("partition_test_legacy", datetime.date(2024, 2, 1)),
+                ("partition_test_p202402", datetime.date(2024, 3, 1)),
+                ("partition_test_p202403", datetime.date(2024, 4, 1)),
+                ("partition_test_p202404", datetime.date(2024, 5, 1)),
+            ]
+            introspection = connection.introspection
+            assert set(introspection.get_constraints(cursor, "partition_test")) == names
+            # The indexes of the existing table were attached, not built again, and
+            # the CHECK constraint is gone
+            assert set(
+                introspection.get_constraints(cursor, "partition_test_legacy")
+            ) == {
+                "partition_test_legacy_pkey",
+                "partition_test_page_legacy",
+                "partition_test_platform_like_legacy",
+                "partition_test_page_fk",
+            }
+
+            cursor.execute(
+                "INSERT INTO partition_test (timestamp, page_id, platform) "
+                "VALUES ('2024-03-10', %s, 'web'), ('2030-01-01', %s, 'web') "
+                "RETURNING id",
+                [page.id, page.id],
+            )
+            assert [row[0] for row in cursor.fetchall()] == [2, 3]
+            cursor.execute("SELECT id FROM partition_test_legacy")
+            assert cursor.fetchall() == [(1,)]
+            cursor.execute("SELECT id FROM partition_test_default")
+            assert cursor.fetchall() == [(3,)]
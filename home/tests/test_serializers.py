@@ -464,6 +464,9 @@ class TestFormatMessage:
         """
         page = create_content_page(wa_body_count=1, wa_gender_var=["female"])
         result = format_whatsapp_message(0, page, "whatsapp")
+        # The page's own message body isn't changed
+        [variation] = page.whatsapp_body.raw_data[0]["value"]["variation_messages"]
+        assert variation["value"]["message"] == "WhatsApp Varied 1"
 
         expected_result = {
             "type": "Whatsapp_Message",
@@ -1,8 +1,10 @@
 import json
+from datetime import timedelta
 from urllib.parse import urlencode
 
 import pytest
 from bs4 import BeautifulSoup
+from django.db import connection as db_connection
 from django.urls import reverse
 from django.utils import timezone  # type: ignore
 from pytest_django import asserts
@@ -11,8 +13,9 @@ from rest_framework.test import APIClient
 from wagtail.models import Locale
 
 from home.models import ContentPageRating, HomePage, PageView
+from home.page_view_rollups import roll_up_page_views
 from home.serializers import ContentPageRatingSerializer, PageViewSerializer
-from home.views import PageViewFilterSet
+from home.views import PageViewFilterSet, PageViewViewSet, data_filter
 
 from .page_builder import (
     MBlk,
@@ -217,6 +220,99 @@ class TestPageViews:
             "message": None,
         }
 
+    def test_get_views_based_on_data(self, api_client):
+        """
+        The list endpoint can be filtered on keys of the data of the page views,
+        including nested keys and lookups on keys
+        """
+        page = self.create_content_page()
+        revision = page.get_latest_revision()
+        view1 = page.views.create(
+            revision=revision, data={"contact_uuid": "abc", "flow": {"name": "one"}}
+        )
+        view2 = page.views.create(
+            revision=revision, data={"contact_uuid": "abd", "flow": {"name": "two"}}
+        )
+        page.views.create(revision=revision, data={})
+
+        def get_ids(**params):
+            response = api_client.get(f"/api/v2/custom/pageviews/?{urlencode(params)}")
+            return [result["id"] for result in response.json()["results"]]
+
+        assert get_ids(data__contact_uuid="abc") == [view1.id]
+        assert get_ids(data__flow__name="two") == [view2.id]
+        assert get_ids(data__contact_uuid="abc", data__flow__name="two") == []
+        assert get_ids(data__contact_uuid__startswith="ab") == [view1.id, view2.id]
+
+    def test_get_views_unique_pages(self, api_client, monkeypatch):
+        """
+        With unique_pages, the list endpoint returns the latest view of each
+        page, ordered by timestamp and paginated with a cursor, and the
+        timestamp filter still applies
+        """
+        monkeypatch.setattr(PageViewViewSet.pagination_class, "page_size", 2)
+        home_page = HomePage.objects.first()
+        main_menu = PageBuilder.build_cpi(home_page, "main-menu", "Main Menu")
+        pages = [
+            PageBuilder.build_cp(
+                parent=main_menu,
+                slug=f"page-{i}",
+                title=f"Page {i}",
+                bodies=[WABody(f"Page {i}", [WABlk("body")])],
+            )
+            for i in range(3)
+        ]
+        start = timezone.now() - timedelta(days=1)
+        views = {}
+        for minutes, page in enumerate(pages + pages[:2] + pages[:1]):
+            view = page.views.create(revision=page.get_latest_revision())
+            PageView.objects.filter(id=view.id).update(
+                timestamp=start + timedelta(minutes=minutes)
+            )
+            views[page.id] = view.id
+        old = pages[2].views.create(revision=pages[2].get_latest_revision())
+        PageView.objects.filter(id=old.id).update(timestamp=start - timedelta(days=1))
+
+        response = api_client.get(
+            "/api/v2/custom/pageviews/", {"unique_pages": "true"}
+        ).json()
+        assert [r["id"] for r in response["results"]] == [
+            views[pages[2].id],
+            views[pages[1].id],
+        ]
+        response = api_client.get(response["next"]).json()
+        assert [r["id"] for r in response["results"]] == [views[pages[0].id]]
+        assert response["next"] is None
+
+        response = api_client.get(
+            "/api/v2/custom/pageviews/",
+            {
+                "unique_pages": "true",
+                "timestamp_gt": (start + timedelta(minutes=3)).isoformat(),
+            },
+        ).json()
+        assert [r["id"] for r in response["results"]] == [
+            views[pages[1].id],
+            views[pages[0].id],
+        ]
+
+    @pytest.mark.skipif(
+        db_connection.vendor != "postgresql", reason="Needs the GIN index"
+    )
+    def test_data_filters_use_index(self):
+        """
+        The data filters of the list endpoint are containment lookups, which can
+        use the GIN index on data
+        """
+        queryset = PageView.objects.filter(data_filter("data__contact_uuid", "abc"))
+        with db_connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            # The partitions of the page views table each have their own index
+            assert "Index Cond: (data @>" in queryset.explain()
+            assert "Index Cond" not in (
+                PageView.objects.filter(data__contact_uuid="abc").explain()
+            )
+
 
 @pytest.mark.django_db
 class TestEditPageView:
@@ -891,3 +987,68 @@ class TestPageViewReportView:
         filtered_queryset = filter_set.qs
 
         assert filtered_queryset.count() == 0
+
+    def test_views_per_month(self, admin_client):
+        """
+        The chart of views per month is built from the rollups and the page
+        views recorded since, and the filtered page views are still listed
+        """
+        [page] = self.create_content_page(1)
+        for timestamp, platform in [
+            ("2024-01-01T10:00:00Z", "web"),
+            ("2024-01-02T10:00:00Z", "whatsapp"),
+            ("2024-02-01T10:00:00Z", "whatsapp"),
+        ]:
+            view = page.views.create(
+                revision=page.get_latest_revision(), platform=platform
+            )
+            PageView.objects.filter(id=view.id).update(timestamp=timestamp)
+        roll_up_page_views()
+        page.views.create(revision=page.get_latest_revision(), platform="whatsapp")
+
+        response = admin_client.get(reverse("page_view_report"))
+        data = json.loads(response.context["page_view_data"])
+        this_month = str(timezone.localdate().replace(day=1))
+        assert data["labels"] == ["2024-01-01", "2024-02-01", this_month]
+        assert [d["y"] for d in data["data"]] == [2, 1, 1]
+        assert response.context["object_list"].count() == 4
+
+        response = admin_client.get(
+            reverse("page_view_report"),
+            {
+                "platform": "whatsapp",
+                "timestamp_0": "2024-01-02",
+                "timestamp_1": "2024-03-01",
+            },
+        )
+        data = json.loads(response.context["page_view_data"])
+        assert data["data"] == [
+            {"x": "2024-01-01", "y": 1},
+            {"x": "2024-02-01", "y": 1},
+        ]
+        assert response.context["object_list"].count() == 2
+
+    def test_stale_content_view_counts(self, admin_client):
+        """
+        The stale content report shows the stored view count of each page, and
+        can be filtered on it
+        """
+        pages = self.create_content_page(2)
+        for _ in range(4):
+            pages[0].views.create(revision=pages[0].get_latest_revision())
+        PageView.objects.update(timestamp=timezone.now() - timedelta(hours=1))
+        roll_up_page_views()
+        # Not rolled up yet, so not counted
+        pages[0].views.create(revision=pages[0].get_latest_revision())
+
+        response = admin_client.get(reverse("stale_content_report"))
+        counts = {p.id: p.view_counter for p in response.context["object_list"]}
+        assert counts[pages[0].id] == 4
+        assert counts[pages[1].id] == 0
+
+        response = admin_client.get(
+            reverse("stale_content_report"), {"view_counter": 1}
+        )
+        ids = [p.id for p in response.context["object_list"]]
+        assert pages[1].id in ids
+        assert pages[0].id not in ids
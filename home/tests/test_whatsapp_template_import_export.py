@@ -118,7 +118,17 @@ def remove_example_value_ids(template: DbDict) -> DbDict:
     return template
 
 
-WHATSAPP_TEMPLATE_FILTER_FUNCS = [remove_example_value_ids, normalise_pks]
+@per_template
+def remove_timestamps(template: DbDict) -> DbDict:
+    template["fields"].pop("updated_at", None)
+    return template
+
+
+WHATSAPP_TEMPLATE_FILTER_FUNCS = [
+    remove_example_value_ids,
+    remove_timestamps,
+    normalise_pks,
+]
 
 
 @dataclass
@@ -6,8 +6,8 @@ import threading
 import django_filters
 from django.contrib import messages
 from django.db import connection as db_connection
-from django.db.models import Count, F
-from django.db.models.functions import TruncMonth
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.fields.json import KeyTransform
 from django.forms import MultiWidget
 from django.forms.widgets import NumberInput
 from django.http import JsonResponse
@@ -45,6 +45,7 @@ from .models import (
     PageView,
     WhatsAppTemplate,
 )
+from .page_view_rollups import annotate_view_counts, get_views_per_month
 from .serializers import ContentPageRatingSerializer, PageViewSerializer
 from .whatsapp_template_import_export import (
     ImportWhatsAppTemplateException,
@@ -79,7 +80,9 @@ class StaleContentReportFilterSet(WagtailFilterSet):
         label=_("Last published before"), lookup_expr="lte", widget=AdminDateInput
     )
     view_counter = django_filters.NumberFilter(
-        label=_("View count"), lookup_expr="lte", widget=NumberInput
+        label=_("View count"),
+        method="filter_view_counter",
+        widget=NumberInput,
     )
     o = django_filters.OrderingFilter(
         # tuple-mapping retains order
@@ -93,6 +96,13 @@ class StaleContentReportFilterSet(WagtailFilterSet):
         model = ContentPage
         fields = ["live", "last_published_at"]
 
+    def filter_view_counter(self, queryset, name, value):
+        # Filter on the indexed stored count rather than the annotation, pages
+        # without a counter haven't been viewed
+        return queryset.filter(
+            Q(view_count__count__lte=value) | Q(view_count__isnull=True)
+        )
+
 
 class PageViewFilterSet(WagtailFilterSet):
     platform_choices = [
@@ -120,15 +130,20 @@ class ContentPageReportView(ReportView):
     title = "Content Pages"
     template_name = "reports/stale_content_report.html"
     filterset_class = StaleContentReportFilterSet
-    list_export = PageReportView.list_export + ["last_published_at", "view_counter"]
+    list_export = PageReportView.list_export + [
+        "last_published_at",
+        "view_counter",
+        "last_viewed_at",
+    ]
     export_headings = dict(
         last_published_at="Last Published",
         view_counter="View Count",
+        last_viewed_at="Last Viewed",
         **PageReportView.export_headings,
     )
 
     def get_queryset(self):
-        return ContentPage.objects.annotate(view_counter=Count("views")).all()
+        return annotate_view_counts(ContentPage.objects.all())
 
 
 class PageViewReportView(ReportView):
@@ -145,16 +160,20 @@ class PageViewReportView(ReportView):
         return self.filter_queryset(self.get_queryset())
 
     def get_views_data(self):
-        view_per_month = list(
-            self.get_filtered_queryset()[1]
-            .annotate(month=TruncMonth("timestamp"))
-            .values("month")
-            .annotate(x=F("month"), y=Count("page_id"))
-            .values("x", "y")
+        filters = {}
+        if self.filters.is_valid():
+            filters = self.filters.form.cleaned_data
+        timestamp = filters.get("timestamp")
+        view_per_month = get_views_per_month(
+            platform=filters.get("platform"),
+            page=filters.get("page"),
+            start=timestamp.start if timestamp else None,
+            end=timestamp.stop if timestamp else None,
         )
-        view_per_month.sort(key=lambda item: item["x"])
-        labels = [item["x"].date() for item in view_per_month]
-        return {"data": view_per_month, "labels": labels}
+        return {
+            "data": [{"x": month, "y": count} for month, count in view_per_month],
+            "labels": [month for month, _ in view_per_month],
+        }
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -581,6 +600,43 @@ class GenericListViewset(GenericViewSet, ListModelMixin):
     permission_classes = (permissions.IsAuthenticated,)
 
 
+def data_filter(key, value):
+    """
+    Returns the filter for a `data__<key>=<value>` query parameter. On Postgres,
+    a filter on a key is the same as filtering on data containing that key and
+    value, and containment can use the GIN index on data.
+    """
+    path = key.split("__")[1:]
+    if (
+        db_connection.vendor != "postgresql"
+        # Other lookups, eg. data__name__icontains, can't use the index
+        or path[-1] in KeyTransform.get_lookups()
+        # Array indexes don't mean the same thing in a containment lookup
+        or any(part.isdigit() for part in path)
+    ):
+        return Q(**{key: value})
+    contains = value
+    for part in reversed(path):
+        contains = {part: contains}
+    return Q(data__contains=contains)
+
+
+def latest_page_views(queryset):
+    """
+    Returns the ids of the latest page view of each page in `queryset`. Each one
+    is a lookup on the (page, timestamp) index, so this takes time proportional
+    to the number of pages rather than the number of page views.
+    """
+    latest = (
+        queryset.filter(page=OuterRef("pk")).order_by("-timestamp", "-id").values("id")
+    )
+    return (
+        ContentPage.objects.annotate(latest_view=Subquery(latest[:1]))
+        .filter(latest_view__isnull=False)
+        .values("latest_view")
+    )
+
+
 class PageViewViewSet(GenericListViewset):
     queryset = PageView.objects.all()
     serializer_class = PageViewSerializer
@@ -591,16 +647,11 @@ class PageViewViewSet(GenericListViewset):
         queryset = self.queryset
         for key, value in self.request.GET.items():
             if "data__" in key:
-                queryset = queryset.filter(**{key: value})
+                queryset = queryset.filter(data_filter(key, value))
 
-        # Only return unique pages
+        # Only return the latest view of each page
         if self.request.GET.get("unique_pages", False) == "true":
-            if db_connection.vendor == "postgresql":
-                # Fields used for "distinct" must be used for ordering
-                self.paginator.ordering = "page"
-                queryset = queryset.distinct("page")
-            else:
-                raise ValidationError({"unique_pages": ["This query is not supported"]})
+            queryset = queryset.filter(id__in=latest_page_views(queryset))
 
         return queryset
 
@@ -613,9 +664,10 @@ class ContentPageRatingViewSet(GenericListViewset, CreateModelMixin):
     def create(self, request, *args, **kwargs):
         if "page" in request.data:
             try:
-                page = ContentPage.objects.get(id=request.data["page"])
                 # FIXME: why are we altering the request data here
-                request.data["revision"] = page.get_latest_revision().id
+                request.data["revision"] = ContentPage.objects.values_list(
+                    "latest_revision_id", flat=True
+                ).get(id=request.data["page"])
             except ContentPage.DoesNotExist:
                 raise ValidationError({"page": ["Page matching query does not exist."]})
 